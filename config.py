@@ -74,6 +74,10 @@ class Settings(BaseSettings):
     project_timeout_minutes: int = 30
     base_port: int = 19006
     code_generation_timeout: int = 900  # 15 minutes in seconds
+    screen_cache_enabled: bool = Field(
+        default=False,
+        description="Reuse screens from the same user's similar earlier prompts (costs an embedding call per generation)"
+    )
     
     # Resource Limits
     max_cpu_percent: float = 90.0
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 from typing import Optional
 
-from services.streaming_generator import StreamingGenerator, ProgressUpdate
+from services.streaming_generator import ProgressUpdate
 from services.websocket_manager import connection_manager
 from middleware.auth import verify_api_key
 from utils.sanitization import sanitize_prompt, sanitize_user_id, SanitizationError
@@ -36,15 +36,11 @@ class FastGenerateResponse(BaseModel):
 
 
 async def create_streaming_generator():
-    """Get streaming generator instance"""
+    """Get the shared streaming generator instance"""
     from main import (
-        code_generator,
-        screen_generator,
         project_manager,
-        command_executor,
-        tunnel_manager,
-        cloud_storage_manager,
-        resource_monitor
+        resource_monitor,
+        streaming_generator
     )
     
     # Check capacity
@@ -55,14 +51,7 @@ async def create_streaming_generator():
     if not can_accept:
         raise ResourceLimitError(reason)
     
-    return StreamingGenerator(
-        code_generator=code_generator,
-        screen_generator=screen_generator,
-        project_manager=project_manager,
-        command_executor=command_executor,
-        tunnel_manager=tunnel_manager,
-        cloud_storage_manager=cloud_storage_manager
-    )
+    return streaming_generator
 
 
 async def generate_in_background(
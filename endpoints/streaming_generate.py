@@ -10,7 +10,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 
 from services.websocket_manager import connection_manager
-from services.streaming_generator import StreamingGenerator, ProgressUpdate
+from services.streaming_generator import ProgressUpdate
 from middleware.auth import verify_api_key
 from utils.sanitization import sanitize_prompt, sanitize_user_id, SanitizationError
 from exceptions import ValidationError
@@ -36,29 +36,14 @@ class StreamingGenerateResponse(BaseModel):
 
 
 async def create_streaming_generator():
-    """Dependency to get streaming generator instance"""
+    """Dependency to get the shared streaming generator instance"""
     # Import here to avoid circular imports
-    from main import (
-        code_generator,
-        screen_generator,
-        project_manager,
-        command_executor,
-        tunnel_manager,
-        cloud_storage_manager
-    )
+    from main import streaming_generator
     
-    if not all([code_generator, screen_generator, project_manager, 
-                command_executor, tunnel_manager]):
+    if streaming_generator is None:
         raise HTTPException(status_code=503, detail="Services not initialized")
     
-    return StreamingGenerator(
-        code_generator=code_generator,
-        screen_generator=screen_generator,
-        project_manager=project_manager,
-        command_executor=command_executor,
-        tunnel_manager=tunnel_manager,
-        cloud_storage_manager=cloud_storage_manager
-    )
+    return streaming_generator
 
 
 @router.post("/generate-stream", response_model=StreamingGenerateResponse)
@@ -185,6 +185,7 @@ resource_monitor: ResourceMonitor = None
 cloud_storage_manager: CloudStorageManager = None
 screen_generator = None
 parallel_workflow = None
+streaming_generator = None
 cloud_logging_service = None
 shared_deps_manager = None
 project_builder = None
@@ -199,7 +200,7 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting AI Expo App Builder API...")
     
-    global code_generator, project_manager, command_executor, tunnel_manager, resource_monitor, cloud_storage_manager, screen_generator, parallel_workflow, cloud_logging_service, shared_deps_manager, project_builder, auth_service
+    global code_generator, project_manager, command_executor, tunnel_manager, resource_monitor, cloud_storage_manager, screen_generator, parallel_workflow, streaming_generator, cloud_logging_service, shared_deps_manager, project_builder, auth_service
     
     # Initialize auth_service as None first
     auth_service = None
@@ -245,10 +246,17 @@ async def lifespan(app: FastAPI):
         min_disk_percent=settings.min_disk_percent
     )
     
+    # Initialize Shared Dependencies Manager
+    from services.shared_dependencies import SharedDependenciesManager
+    shared_deps_manager = SharedDependenciesManager(
+        shared_dir=os.path.join(settings.projects_base_dir, "shared_node_modules")
+    )
+    
     # Initialize Cloud Storage Manager
     cloud_storage_manager = CloudStorageManager(
         bucket_name=settings.google_cloud_bucket,
-        project_id=settings.google_cloud_project
+        project_id=settings.google_cloud_project,
+        shared_deps_manager=shared_deps_manager
     )
     
     if not cloud_storage_manager.is_available():
@@ -274,6 +282,18 @@ async def lifespan(app: FastAPI):
         tunnel_manager=tunnel_manager
     )
     
+    # Shared by the streaming and fast generation endpoints
+    from services.streaming_generator import StreamingGenerator
+    streaming_generator = StreamingGenerator(
+        code_generator=code_generator,
+        screen_generator=screen_generator,
+        project_manager=project_manager,
+        command_executor=command_executor,
+        tunnel_manager=tunnel_manager,
+        cloud_storage_manager=cloud_storage_manager,
+        use_screen_cache=settings.screen_cache_enabled
+    )
+    
     # Initialize Cloud Logging service
     from services.cloud_logging import CloudLoggingService
     cloud_logging_service = CloudLoggingService(
@@ -281,12 +301,6 @@ async def lifespan(app: FastAPI):
         enabled=bool(settings.google_cloud_project)
     )
     
-    # Initialize Shared Dependencies Manager
-    from services.shared_dependencies import SharedDependenciesManager
-    shared_deps_manager = SharedDependenciesManager(
-        shared_dir=os.path.join(settings.projects_base_dir, "shared_node_modules")
-    )
-    
     # Initialize Project Builder
     from services.project_builder import ProjectBuilder
     project_builder = ProjectBuilder(shared_deps_manager=shared_deps_manager)
@@ -314,6 +328,16 @@ async def lifespan(app: FastAPI):
     if tunnel_manager:
         await tunnel_manager.close_all_tunnels()
     
+    multi_ai.close()
+    if streaming_generator:
+        streaming_generator.close()
+    
+    # Close pooled OpenAI and image download connections
+    from services.code_generator import close_shared_clients
+    from services.gemini_image import close_download_client
+    await close_shared_clients()
+    await close_download_client()
+    
     logger.info("Shutdown complete")
 
 
@@ -3155,16 +3179,15 @@ Provide a brief summary of changes at the end starting with "SUMMARY:"
         current_content = []
         current_action = None  # 'edit' or 'create'
         summary = ""
+        # Relative path -> content, written in one batch once parsing is done
+        pending_files = {}
         
         for line in ai_response.split('\n'):
             if line.startswith('// EDIT:') or line.startswith('// CREATE:'):
                 # Start of new file operation
                 if current_file and current_content:
-                    # Save previous file
-                    file_path = project_path / current_file
-                    file_path.parent.mkdir(parents=True, exist_ok=True)
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(current_content))
+                    # Queue previous file
+                    pending_files[current_file] = '\n'.join(current_content)
                     
                     if current_action == 'create':
                         files_created.append(current_file)
@@ -3184,10 +3207,7 @@ Provide a brief summary of changes at the end starting with "SUMMARY:"
             elif line.startswith('// END_EDIT') or line.startswith('// END_CREATE'):
                 # End of file operation
                 if current_file and current_content:
-                    file_path = project_path / current_file
-                    file_path.parent.mkdir(parents=True, exist_ok=True)
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(current_content))
+                    pending_files[current_file] = '\n'.join(current_content)
                     
                     if current_action == 'create':
                         files_created.append(current_file)
@@ -3206,10 +3226,7 @@ Provide a brief summary of changes at the end starting with "SUMMARY:"
         
         # Handle last file if no END marker
         if current_file and current_content:
-            file_path = project_path / current_file
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(current_content))
+            pending_files[current_file] = '\n'.join(current_content)
             
             if current_action == 'create':
                 files_created.append(current_file)
@@ -3227,8 +3244,14 @@ Provide a brief summary of changes at the end starting with "SUMMARY:"
                 changes_summary="No changes made"
             )
         
-        # Trigger Metro reload
-        file_manager._trigger_reload(validated_project_id)
+        # Write every file in one batch; this also triggers a single Metro reload
+        if not file_manager.write_files(validated_project_id, pending_files):
+            return ChatEditResponse(
+                success=False,
+                message="Failed to write the edited files. Paths outside the project are rejected.",
+                files_modified=[],
+                changes_summary="No changes made"
+            )
         
         logger.info(f"Successfully modified {len(files_modified)} and created {len(files_created)} files for project {validated_project_id}")
         
@@ -3365,7 +3388,14 @@ async def websocket_watch_files(websocket: WebSocket, project_id: str):
 # File Management Endpoints
 from services.file_manager import FileManager
 
-file_manager = FileManager()
+
+def _project_directory(project_id: str) -> Optional[str]:
+    """Directory a project actually runs from, so editor changes reach it"""
+    project = project_manager.get_project(project_id) if project_manager else None
+    return project.directory if project else None
+
+
+file_manager = FileManager(settings.projects_base_dir, directory_lookup=_project_directory)
 
 class FileContentRequest(BaseModel):
     content: str
@@ -3975,15 +4005,16 @@ async def generate_image(request: ImageGenerateRequest):
         
         # Try to generate image with AI
         try:
-            logger.info("Importing AIImageGenerator...")
-            from services.gemini_image import AIImageGenerator
-            
-            logger.info("Initializing image generator...")
-            image_generator = AIImageGenerator()
+            # Reuse the screen generator's image generator (same configured keys)
+            if screen_generator:
+                image_generator = screen_generator.image_generator
+            else:
+                from services.gemini_image import AIImageGenerator
+                image_generator = AIImageGenerator()
             
             logger.info(f"Generating image with prompt: {sanitized_prompt[:50]}...")
             # Generate image (tries Gemini first, falls back to OpenAI)
-            image_data, provider = image_generator.generate_image(sanitized_prompt)
+            image_data, provider = await image_generator.generate_image(sanitized_prompt)
             
             logger.info(f"Generation result - Image data: {image_data is not None}, Provider: {provider}")
             
@@ -15,19 +15,22 @@ logger = logging.getLogger(__name__)
 class CloudStorageManager:
     """Manages project storage in Google Cloud Storage"""
     
-    def __init__(self, bucket_name: str, project_id: str = None):
+    def __init__(self, bucket_name: str, project_id: str = None, shared_deps_manager=None):
         """
         Initialize Cloud Storage Manager
         
         Args:
             bucket_name: GCS bucket name (required for production)
             project_id: Google Cloud project ID (required for production)
+            shared_deps_manager: Optional SharedDependenciesManager used to
+                restore node_modules on download
         
         Note: In Cloud Run, this will use the default service account automatically.
         No service account key file is needed.
         """
         self.bucket_name = bucket_name
         self.project_id = project_id
+        self.shared_deps_manager = shared_deps_manager
         self.client = None
         self.bucket = None
         
@@ -83,7 +86,12 @@ class CloudStorageManager:
             # Upload to GCS
             blob_name = f"projects/{project_id}.zip"
             blob = self.bucket.blob(blob_name)
-            blob.upload_from_filename(zip_path)
+            # CRC32C is hardware-accelerated via google-crc32c; MD5 is not
+            blob.upload_from_filename(
+                zip_path,
+                content_type="application/zip",
+                checksum="crc32c"
+            )
             
             # Clean up local ZIP
             os.remove(zip_path)
@@ -120,7 +128,7 @@ class CloudStorageManager:
             blob = self.bucket.blob(blob_name)
             
             zip_path = f"/tmp/{project_id}.zip"
-            blob.download_to_filename(zip_path)
+            blob.download_to_filename(zip_path, checksum="crc32c")
             
             # Extract
             os.makedirs(target_dir, exist_ok=True)
@@ -130,6 +138,14 @@ class CloudStorageManager:
             # Clean up ZIP
             os.remove(zip_path)
             
+            # Link node_modules (excluded from the archive) from the shared pool
+            # if a ready entry exists; a miss is installed in the background
+            if self.shared_deps_manager:
+                try:
+                    await self.shared_deps_manager.link_project_node_modules(target_dir)
+                except Exception as e:
+                    logger.warning(f"Failed to link shared node_modules for {project_id}: {e}")
+            
             logger.info(f"Project downloaded to {target_dir}")
             return True
             
@@ -3,36 +3,322 @@ Code Generator Service
 Handles AI-powered code generation using OpenAI API
 """
 import asyncio
-from typing import List, Optional
-from dataclasses import dataclass
-from openai import AsyncOpenAI, OpenAIError, APITimeoutError
+import re
+from typing import Dict, Final, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+import httpx
+from openai import (
+    AsyncOpenAI,
+    OpenAIError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+)
 import logging
 
 from exceptions import AIGenerationError, CodeValidationError
+from utils.retry import with_retry, RetryConfig
 
 logger = logging.getLogger(__name__)
 
+# OpenAI errors worth retrying. APITimeoutError is an APIConnectionError but is
+# excluded: an attempt that used the whole timeout won't do better on a retry
+_TRANSIENT_OPENAI_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+_NON_RETRYABLE_OPENAI_ERRORS = (APITimeoutError,)
 
-@dataclass
+# Expo SDK version recorded on generated code
+_DEFAULT_EXPO_VERSION: Final[str] = "50.0.0"
+
+# Valid npm package name (optionally scoped), used to filter LLM-listed dependencies
+_DEP_RE = re.compile(r'[A-Za-z0-9@][A-Za-z0-9@/_.\-]*')
+
+# Translation table removing quotes around LLM-listed dependencies
+_QUOTE_STRIP_TABLE = str.maketrans('', '', '\'"')
+
+# Substrings every generated main file must contain
+_REQUIRED_CODE_PATTERNS = (
+    "import",  # Must have at least one import
+    "export default",  # Must export default component
+)
+
+# One alternation finds every required marker in a single scan of the main
+# file; "react" is matched case-insensitively ("react-native" contains it)
+_REQUIRED_MARKERS_RE = re.compile(r'import|export default|(?i:react)')
+
+# "// FILE: path" separator line between files in one code block
+_FILE_MARKER_RE = re.compile(r'^[ \t]*// FILE:(.*)$', re.MULTILINE)
+
+# Only this many leading characters are scanned for the DEPENDENCIES comment
+_DEPENDENCY_HEADER_CHARS = 2048
+
+# Characters stripped from generated app names
+_NAME_SANITIZE_RE = re.compile(r'[^a-z0-9]')
+
+_SYSTEM_PROMPT = """You are an expert React Native and Expo developer. Generate complete, production-ready mobile application code based on user requirements.
+
+Requirements:
+- Use Expo SDK 50+
+- Follow React Native best practices
+- Include proper error handling
+- Use TypeScript for type safety
+- Include necessary imports
+- Create functional components with hooks
+- Add inline comments for complex logic
+- Ensure code is ready to run without modifications
+
+Output Format:
+Provide the complete App.tsx file content.
+Start your response with the code directly - no explanations before the code.
+Use TypeScript and include proper type annotations.
+Include any additional component files if needed (separate with "// FILE: ComponentName.tsx").
+Specify any required Expo packages beyond defaults in a comment at the top.
+
+IMPORTANT: For dependencies, list ONLY the package names separated by commas, NO comments or explanations.
+
+Example output structure:
+```typescript
+// DEPENDENCIES: expo-linear-gradient, @expo/vector-icons
+import React from 'react';
+import { View, Text } from 'react-native';
+
+export default function App() {
+  return (
+    <View>
+      <Text>Hello World</Text>
+    </View>
+  );
+}
+```"""
+
+# Shared OpenAI clients keyed by (api_key, timeout) so TCP/TLS connections
+# are pooled across CodeGenerator instances instead of per instance
+_shared_clients: Dict[Tuple[str, float], AsyncOpenAI] = {}
+
+
+def get_shared_client(api_key: str, timeout: float) -> AsyncOpenAI:
+    """
+    Get a process-wide AsyncOpenAI client for the given key and timeout
+    
+    Args:
+        api_key: OpenAI API key
+        timeout: Default timeout in seconds for API calls
+        
+    Returns:
+        Shared AsyncOpenAI client
+    """
+    key = (api_key, timeout)
+    client = _shared_clients.get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=timeout,
+            http_client=httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+            )
+        )
+        _shared_clients[key] = client
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Close all shared OpenAI clients (call on application shutdown)"""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        await client.close()
+
+
+@dataclass(slots=True)
 class CodeFile:
     """Represents a generated code file"""
     path: str
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class GeneratedCode:
     """Container for generated code and metadata"""
     files: List[CodeFile]
     dependencies: List[str]
     expo_version: str
+    _by_path: Dict[str, CodeFile] = field(default_factory=dict, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Index files by path; the first file wins if a path repeats
+        for file in self.files:
+            self._by_path.setdefault(file.path, file)
     
     def get_main_file(self) -> CodeFile:
         """Get the main App.js or App.tsx file"""
-        for file in self.files:
-            if file.path in ["App.js", "App.tsx"]:
-                return file
-        raise ValueError("No main App file found in generated code")
+        main_file = self._by_path.get("App.tsx") or self._by_path.get("App.js")
+        if main_file is None:
+            raise ValueError("No main App file found in generated code")
+        return main_file
+
+
+class _ResponseParser:
+    """
+    Incremental parser for generated code responses
+    
+    Text may be fed in arbitrary chunks (e.g. streamed tokens). Complete lines
+    are processed immediately: the DEPENDENCIES header, code fences and
+    "// FILE:" separators are all handled in a single pass.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._received = False
+        self._line_count = 0
+        self._offset = 0
+        self._chunks: List[str] = []
+        self._files: List[Tuple[str, str]] = []
+        self._dependencies: List[str] = []
+        self._deps_found = False
+        self._in_code_block = False
+        self._found_code_block = False
+        self._current_path = "App.tsx"
+        self._current_lines: List[str] = []
+    
+    def is_empty(self) -> bool:
+        """Whether no text has been fed yet"""
+        return not self._received
+    
+    def feed(self, text: str) -> None:
+        """
+        Feed a chunk of response text
+        
+        Args:
+            text: Next chunk of the response
+        """
+        if not text:
+            return
+        self._received = True
+        self._chunks.append(text)
+        self._buffer += text
+        
+        # Keep any incomplete trailing line buffered until more text arrives
+        end = self._buffer.rfind('\n')
+        if end == -1:
+            return
+        complete, self._buffer = self._buffer[:end], self._buffer[end + 1:]
+        for line in complete.split('\n'):
+            self._process_line(line.rstrip('\r'))
+    
+    def finish(self) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[str, ...]]:
+        """
+        Flush buffered text and return the parse result
+        
+        Returns:
+            Tuple of ((path, content) file entries, dependencies)
+        """
+        if self._buffer:
+            self._process_line(self._buffer.rstrip('\r'))
+            self._buffer = ""
+        
+        files = self._files
+        # If no code blocks found, treat entire content as code
+        if not self._found_code_block:
+            files = self._split_code_block(''.join(self._chunks))
+        
+        return tuple(files), tuple(self._dependencies)
+    
+    def _process_line(self, line: str) -> None:
+        """Advance the parser state machine by one line"""
+        # Check first 10 lines of a bounded header for dependencies - the
+        # system prompt puts them at the top
+        if (
+            not self._deps_found
+            and self._line_count < 10
+            and self._offset < _DEPENDENCY_HEADER_CHARS
+            and ('DEPENDENCIES:' in line or 'dependencies:' in line.lower())
+        ):
+            self._dependencies = self._parse_dependency_line(line)
+            self._deps_found = True
+        self._line_count += 1
+        self._offset += len(line) + 1
+        
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            if self._in_code_block:
+                # End of code block
+                self._flush_file()
+                self._found_code_block = True
+            # Start or end of code block - either way the next file is App.tsx
+            self._in_code_block = not self._in_code_block
+            self._current_path = "App.tsx"
+            self._current_lines = []
+        elif self._in_code_block:
+            if stripped.startswith('// FILE:'):
+                # Another file in the same block
+                self._flush_file()
+                self._current_path = stripped[len('// FILE:'):].strip()
+                self._current_lines = []
+            else:
+                self._current_lines.append(line)
+    
+    def _flush_file(self) -> None:
+        """Emit the file collected so far"""
+        self._files.append((self._current_path, '\n'.join(self._current_lines).strip()))
+    
+    @staticmethod
+    def _parse_dependency_line(line: str) -> List[str]:
+        """
+        Extract package names from a "// DEPENDENCIES:" comment line
+        
+        Args:
+            line: Line containing the dependency list
+            
+        Returns:
+            List of unique valid package names, in first-seen order
+        """
+        # Insertion-ordered dict dedupes repeated packages in O(1)
+        dependencies: Dict[str, None] = {}
+        
+        # rpartition keeps the whole line when the marker is lowercase
+        _, _, deps_part = line.rpartition('DEPENDENCIES:')
+        deps_part = deps_part.strip()
+        deps_part = deps_part.replace('//', '').strip()
+        raw_deps = [dep.strip() for dep in deps_part.split(',') if dep.strip()]
+        
+        # Clean up dependencies - remove comments and invalid characters
+        for dep in raw_deps:
+            # Remove anything in parentheses (comments)
+            clean_dep = dep.partition('(')[0].strip()
+            # Remove quotes
+            clean_dep = clean_dep.translate(_QUOTE_STRIP_TABLE)
+            # Only add if it looks like a valid package name
+            if _DEP_RE.fullmatch(clean_dep):
+                dependencies[clean_dep] = None
+        
+        return list(dependencies)
+    
+    @staticmethod
+    def _split_code_block(content: str) -> List[Tuple[str, str]]:
+        """
+        Split unfenced code into files on "// FILE:" separators
+        
+        File contents are sliced straight out of content between marker
+        matches, so no intermediate split list is built.
+        
+        Args:
+            content: Code block text
+            
+        Returns:
+            List of (path, content) entries, the first one being App.tsx
+        """
+        files: List[Tuple[str, str]] = []
+        current_path = "App.tsx"
+        start = 0
+        
+        for match in _FILE_MARKER_RE.finditer(content):
+            files.append((current_path, content[start:match.start()].strip()))
+            current_path = match.group(1).strip()
+            start = match.end()
+        
+        files.append((current_path, content[start:].strip()))
+        return files
 
 
 # Legacy alias for backward compatibility
@@ -44,7 +330,7 @@ class CodeGenerationError(AIGenerationError):
 class CodeGenerator:
     """Service for generating React Native + Expo code using OpenAI"""
     
-    def __init__(self, api_key: str, model: str = "gpt-5", timeout: int = 900):
+    def __init__(self, api_key: str, model: str = "gpt-5", timeout: int = 900, max_concurrency: int = 8):
         """
         Initialize the CodeGenerator
         
@@ -52,10 +338,12 @@ class CodeGenerator:
             api_key: OpenAI API key
             model: OpenAI model to use (default: gpt-5)
             timeout: Timeout in seconds for API calls (default: 900 = 15 minutes)
+            max_concurrency: Maximum concurrent requests in generate_many (default: 8)
         """
-        self.client = AsyncOpenAI(api_key=api_key, timeout=timeout)
+        self.client = get_shared_client(api_key, timeout)
         self.model = model
         self.timeout = timeout
+        self.max_concurrency = max_concurrency
         
     def _build_system_prompt(self) -> str:
         """
@@ -64,41 +352,7 @@ class CodeGenerator:
         Returns:
             System prompt string
         """
-        return """You are an expert React Native and Expo developer. Generate complete, production-ready mobile application code based on user requirements.
-
-Requirements:
-- Use Expo SDK 50+
-- Follow React Native best practices
-- Include proper error handling
-- Use TypeScript for type safety
-- Include necessary imports
-- Create functional components with hooks
-- Add inline comments for complex logic
-- Ensure code is ready to run without modifications
-
-Output Format:
-Provide the complete App.tsx file content.
-Start your response with the code directly - no explanations before the code.
-Use TypeScript and include proper type annotations.
-Include any additional component files if needed (separate with "// FILE: ComponentName.tsx").
-Specify any required Expo packages beyond defaults in a comment at the top.
-
-IMPORTANT: For dependencies, list ONLY the package names separated by commas, NO comments or explanations.
-
-Example output structure:
-```typescript
-// DEPENDENCIES: expo-linear-gradient, @expo/vector-icons
-import React from 'react';
-import { View, Text } from 'react-native';
-
-export default function App() {
-  return (
-    <View>
-      <Text>Hello World</Text>
-    </View>
-  );
-}
-```"""
+        return _SYSTEM_PROMPT
     
     def _build_user_prompt(self, prompt: str) -> str:
         """
@@ -125,10 +379,8 @@ Remember to include all necessary imports and make the code ready to run."""
             prompt: User's natural language description of the app
             
         Returns:
-            Simple one-word app name (lowercase, alphanumeric)
-            
-        Raises:
-            AIGenerationError: If name generation fails
+            Simple one-word app name (lowercase, alphanumeric),
+            or "myapp" if the API call fails
         """
         try:
             logger.info("Generating app name from prompt")
@@ -145,19 +397,16 @@ App description: {prompt}
 
 Respond with ONLY the app name, nothing else."""
             
-            response = await asyncio.wait_for(
-                self.client.responses.create(
-                    model=self.model,
-                    input=name_prompt
-                ),
-                timeout=30  # Short timeout for name generation
+            # Short per-request timeout for name generation
+            response = await self.client.with_options(timeout=30.0).responses.create(
+                model=self.model,
+                input=name_prompt
             )
             
             app_name = response.output_text.strip().lower()
             
             # Clean the name - remove any non-alphanumeric characters
-            import re
-            app_name = re.sub(r'[^a-z0-9]', '', app_name)
+            app_name = _NAME_SANITIZE_RE.sub('', app_name)
             
             # Ensure it's not empty and not too long
             if not app_name or len(app_name) < 2:
@@ -165,11 +414,13 @@ Respond with ONLY the app name, nothing else."""
             elif len(app_name) > 15:
                 app_name = app_name[:15]
             
-            logger.info(f"Generated app name: {app_name}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Generated app name: %s", app_name)
             return app_name
             
-        except Exception as e:
-            logger.warning(f"Failed to generate app name: {e}, using default")
+        except (APITimeoutError, OpenAIError, asyncio.TimeoutError, AIGenerationError) as e:
+            # Only API failures fall back to the default; real bugs propagate
+            logger.warning("Failed to generate app name: %s, using default", e)
             return "myapp"
     
     async def generate_app_code(self, prompt: str) -> GeneratedCode:
@@ -188,41 +439,36 @@ Respond with ONLY the app name, nothing else."""
         try:
             logger.info(f"Starting code generation with model {self.model}")
             
-            # Build the full prompt combining system and user prompts
-            full_prompt = f"{self._build_system_prompt()}\n\n{self._build_user_prompt(prompt)}"
-            
-            # Create response with GPT-5 API format
-            response = await asyncio.wait_for(
-                self.client.responses.create(
-                    model=self.model,
-                    input=full_prompt
-                ),
-                timeout=self.timeout
-            )
-            
-            # Extract generated code from response
-            generated_content = response.output_text
+            # Send the constant system prompt as instructions so only the
+            # user prompt is built per request (and the prefix is cacheable)
+            # Retry transient failures (connection resets, 429, 5xx) with
+            # jittered exponential backoff; bad requests fail immediately.
+            # Streaming makes the client timeout a per-read limit, so the
+            # whole generation, retries included, is bounded here.
+            async with asyncio.timeout(self.timeout):
+                parser = await with_retry(
+                    lambda: self._stream_response(prompt),
+                    exceptions=_TRANSIENT_OPENAI_ERRORS,
+                    no_retry=_NON_RETRYABLE_OPENAI_ERRORS,
+                    jitter=1.0,
+                    max_delay=10.0,
+                    **RetryConfig.QUICK
+                )
             
-            if not generated_content:
+            if parser.is_empty():
                 raise CodeGenerationError("OpenAI returned empty response")
             
             logger.info("Code generation completed successfully")
             
-            # Parse the response to extract code and metadata
-            return self._parse_generated_code(generated_content)
+            # Finish parsing to extract code and metadata
+            return self._build_generated_code(*parser.finish())
             
-        except asyncio.TimeoutError:
+        except (APITimeoutError, asyncio.TimeoutError):
             logger.error(f"Code generation timed out after {self.timeout} seconds")
             raise AIGenerationError(
                 f"Code generation timed out after {self.timeout} seconds",
                 "Please try again with a simpler prompt"
             )
-        except APITimeoutError:
-            logger.error("OpenAI API timeout")
-            raise AIGenerationError(
-                "OpenAI API request timed out",
-                "Please try again"
-            )
         except OpenAIError as e:
             logger.error(f"OpenAI API error: {str(e)}")
             raise AIGenerationError(
@@ -236,90 +482,112 @@ Respond with ONLY the app name, nothing else."""
                 "Please try again or contact support"
             )
     
-    def _parse_generated_code(self, content: str) -> GeneratedCode:
+    async def _stream_response(self, prompt: str) -> "_ResponseParser":
         """
-        Parse OpenAI response to extract code files and metadata
+        Stream a code generation response into a fresh parser
+        
+        Streaming lets parsing overlap with token delivery. The SDK's own
+        retries are disabled since generate_app_code already retries.
         
         Args:
-            content: Raw content from OpenAI response
+            prompt: User's natural language description of the app
             
         Returns:
-            GeneratedCode object with parsed files and metadata
+            Parser fed with the complete response text
         """
-        files: List[CodeFile] = []
-        dependencies: List[str] = []
-        expo_version = "50.0.0"  # Default version
-        
-        # Extract dependencies from comments
-        lines = content.split('\n')
-        for line in lines[:10]:  # Check first 10 lines for dependencies
-            if 'DEPENDENCIES:' in line or 'dependencies:' in line.lower():
-                # Extract dependencies from comment
-                deps_part = line.split('DEPENDENCIES:', 1)[-1].strip()
-                deps_part = deps_part.replace('//', '').strip()
-                raw_deps = [dep.strip() for dep in deps_part.split(',') if dep.strip()]
-                
-                # Clean up dependencies - remove comments and invalid characters
-                for dep in raw_deps:
-                    # Remove anything in parentheses (comments)
-                    clean_dep = dep.split('(')[0].strip()
-                    # Remove quotes
-                    clean_dep = clean_dep.replace('"', '').replace("'", '')
-                    # Only add if it looks like a valid package name
-                    if clean_dep and not ' ' in clean_dep and clean_dep.replace('-', '').replace('@', '').replace('/', '').replace('.', '').isalnum():
-                        dependencies.append(clean_dep)
-                break
+        parser = _ResponseParser()
+        client = self.client.with_options(max_retries=0)
+        async with client.responses.stream(
+            model=self.model,
+            input=self._build_user_prompt(prompt),
+            instructions=self._build_system_prompt()
+        ) as stream:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    parser.feed(event.delta)
+        return parser
+    
+    async def generate_app_name_and_code(self, prompt: str) -> Tuple[str, GeneratedCode]:
+        """
+        Generate the app name and app code concurrently
         
-        # Extract code blocks
-        code_blocks = []
-        in_code_block = False
-        current_block = []
-        
-        for line in lines:
-            if line.strip().startswith('```'):
-                if in_code_block:
-                    # End of code block
-                    code_blocks.append('\n'.join(current_block))
-                    current_block = []
-                    in_code_block = False
-                else:
-                    # Start of code block
-                    in_code_block = True
-            elif in_code_block:
-                current_block.append(line)
+        Both OpenAI requests are independent, so running them together cuts
+        latency to roughly the slower of the two.
         
-        # If no code blocks found, treat entire content as code
-        if not code_blocks:
-            code_blocks = [content]
-        
-        # Process code blocks to extract files
-        for block in code_blocks:
-            # Check for multiple files in one block (separated by // FILE: comments)
-            if '// FILE:' in block:
-                file_parts = block.split('// FILE:')
-                for i, part in enumerate(file_parts):
-                    if i == 0:
-                        # First part is the main App file
-                        files.append(CodeFile(path="App.tsx", content=part.strip()))
-                    else:
-                        # Extract filename and content
-                        lines = part.split('\n', 1)
-                        filename = lines[0].strip()
-                        file_content = lines[1] if len(lines) > 1 else ""
-                        files.append(CodeFile(path=filename, content=file_content.strip()))
-            else:
-                # Single file - assume it's App.tsx
-                files.append(CodeFile(path="App.tsx", content=block.strip()))
+        Args:
+            prompt: User's natural language description of the app
+        
+        Returns:
+            Tuple of (app name, GeneratedCode)
+        
+        Raises:
+            AIGenerationError: If code generation fails
+        """
+        name_task = asyncio.create_task(self.generate_app_name(prompt))
+        code_task = asyncio.create_task(self.generate_app_code(prompt))
+        
+        app_name, code = await asyncio.gather(name_task, code_task, return_exceptions=True)
+        
+        if isinstance(code, BaseException):
+            raise code
+        
+        # Name generation is best-effort; keep the code even if it failed
+        if isinstance(app_name, BaseException):
+            logger.warning(f"Failed to generate app name: {app_name}, using default")
+            app_name = "myapp"
+        
+        return app_name, code
+    
+    async def generate_many(
+        self,
+        prompts: List[str],
+        max_concurrency: Optional[int] = None
+    ) -> List[Union[GeneratedCode, BaseException]]:
+        """
+        Generate code for several prompts concurrently
+        
+        Args:
+            prompts: App descriptions to generate code for
+            max_concurrency: Maximum in-flight requests (default: instance setting)
+            
+        Returns:
+            Results in the same order as prompts; failed prompts yield their exception
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def _generate_one(prompt: str) -> GeneratedCode:
+            async with semaphore:
+                return await self.generate_app_code(prompt)
+        
+        return await asyncio.gather(
+            *(_generate_one(prompt) for prompt in prompts),
+            return_exceptions=True
+        )
+    
+    def _build_generated_code(
+        self,
+        file_entries: Tuple[Tuple[str, str], ...],
+        dependencies: Tuple[str, ...]
+    ) -> GeneratedCode:
+        """
+        Build and validate a GeneratedCode object from parsed entries
         
+        Args:
+            file_entries: (path, content) pairs
+            dependencies: Package names
+            
+        Returns:
+            Validated GeneratedCode object
+        """
         # Ensure we have at least one file
-        if not files:
+        if not file_entries:
             raise CodeValidationError("Failed to extract any code files from generated content")
         
         # Create GeneratedCode object
         generated_code = GeneratedCode(
-            files=files,
-            dependencies=dependencies,
-            expo_version=expo_version
+            files=[CodeFile(path=path, content=file_content) for path, file_content in file_entries],
+            dependencies=list(dependencies),
+            expo_version=_DEFAULT_EXPO_VERSION
         )
         
         # Validate the generated code
@@ -357,20 +625,22 @@ Respond with ONLY the app name, nothing else."""
         except ValueError as e:
             raise CodeValidationError(str(e))
         
-        # Check for required imports
-        required_patterns = [
-            "import",  # Must have at least one import
-            "export default",  # Must export default component
-        ]
+        # Collect required markers in one pass, stopping once all are seen
+        found_markers = set()
+        for match in _REQUIRED_MARKERS_RE.finditer(main_file.content):
+            found_markers.add(match.group().lower())
+            if len(found_markers) == 3:
+                break
         
-        for pattern in required_patterns:
-            if pattern not in main_file.content:
+        # Check for required imports (case-sensitive keywords)
+        for pattern in _REQUIRED_CODE_PATTERNS:
+            if pattern not in found_markers:
                 raise CodeValidationError(
                     f"Generated code missing required pattern: '{pattern}'"
                 )
         
-        # Check for React Native imports
-        if "react-native" not in main_file.content.lower() and "react" not in main_file.content.lower():
+        # Check for React / React Native imports
+        if "react" not in found_markers:
             raise CodeValidationError(
                 "Generated code must import React or React Native components"
             )
@@ -3,19 +3,106 @@ Command Executor Service
 Handles subprocess execution with timeout and error handling
 """
 import asyncio
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import signal
+import socket
 import subprocess
+import sys
+import time
 import logging
 from dataclasses import dataclass
-from typing import Optional, AsyncIterator, Callable
+from collections import deque
+from typing import Optional, AsyncIterator, Callable, Dict, List, Tuple, Union
 from pathlib import Path
 
 from exceptions import CommandExecutionError, CommandTimeoutError, DependencyInstallError
 from utils.sanitization import sanitize_path, SanitizationError
+from utils.singleflight import SingleFlight
+
+try:
+    from config import settings as _settings
+except Exception:
+    # Settings can fail to load (e.g. missing API keys) in standalone use;
+    # the executor falls back to default paths then
+    _settings = None
 
 logger = logging.getLogger(__name__)
 
+# Buffer limit for subprocess pipe readers. The pipe transport already reads
+# up to 256 KiB per syscall; a matching limit keeps it from pausing a noisy
+# build after only 128 KiB of unread output.
+_STREAM_LIMIT = 256 * 1024
+
+# Bytes of stdout kept in the result of a streamed command; every line has
+# already gone to the callback, so the full output is not held in memory
+_STREAMED_STDOUT_TAIL = 64 * 1024
+
+# Lines of Expo server output kept for error reporting, and bytes kept per line
+_OUTPUT_TAIL_LINES = 500
+_OUTPUT_LINE_BYTES = 1024
+
+# Output Expo prints once the dev server is accepting connections ("Waiting on
+# http://...", "Metro waiting on exp://...", "Logs for your project will appear
+# below"). Shared with ProjectBuilder so both agree on when a server is up.
+EXPO_READY_PATTERN = re.compile(r"waiting on|logs for your project", re.IGNORECASE)
+
+# Fingerprint of package.json + package-lock.json as of the last completed
+# setup install. Kept in the project directory, not node_modules, which may be
+# a symlink into the shared pool used by other projects
+_INSTALL_MARKER = '.npm-install-hash'
+
+# Executables run_command is permitted to launch
+_ALLOWED_COMMANDS = frozenset(('npm', 'npx', 'expo', 'node'))
+
+# Subprocesses on Windows need the proactor event loop. It has been the default
+# since Python 3.8, but make sure nobody swapped in the selector loop.
+if sys.platform == 'win32' and not isinstance(
+    asyncio.get_event_loop_policy(), asyncio.WindowsProactorEventLoopPolicy
+):
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+# Keyword arguments shared by every spawn site.
+# - Each child leads its own process group, so a timeout can take down the
+#   whole tree (npx -> node -> metro), not just the direct child.
+# - close_fds=True keeps our sockets and files out of npm/node.
+# - There is deliberately no preexec_fn anywhere. With one, CPython must fork()
+#   and copy this process's page tables. Without one it can use vfork() on
+#   Linux, which stays cheap however large this process grows.
+if os.name == 'nt':
+    _SPAWN_KWARGS = {'close_fds': True, 'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _SPAWN_KWARGS = {'close_fds': True, 'start_new_session': True}
+
+# Tokens that only mean something to a shell; commands are never run through one
+_SHELL_OPERATORS = frozenset(('&&', '||', '|', '&', ';', '>', '>>', '<', '2>', '2>&1'))
+
+
+def _spawn_error(error: OSError, cwd: str) -> CommandExecutionError:
+    """
+    Translate a failed spawn into a CommandExecutionError
+    
+    The working directory is not checked up front; exec reports a missing
+    cwd or executable itself, naming the offending path in the error.
+    
+    Args:
+        error: FileNotFoundError or NotADirectoryError raised by the spawn
+        cwd: Working directory the spawn was given
+        
+    Returns:
+        Error to raise in place of the OSError
+    """
+    if error.filename == cwd:
+        logger.error("Working directory does not exist: %s", cwd)
+        return CommandExecutionError(f"Working directory does not exist: {cwd}")
+    logger.error("Executable not found: %s", error.filename)
+    return CommandExecutionError(f"Executable not found: {error.filename}")
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class CommandResult:
     """Result of command execution"""
     success: bool
@@ -36,23 +123,52 @@ class CommandExecutor:
             default_timeout: Default timeout in seconds (default: 600 = 10 minutes)
         """
         self.default_timeout = default_timeout
+        # Resolve npm/npx once so commands can be exec'd without a shell
+        # (on Windows they are .cmd shims that CreateProcess won't find by name)
+        self._npm_path = shutil.which('npm.cmd' if os.name == 'nt' else 'npm') or 'npm'
+        self._npx_path = shutil.which('npx.cmd' if os.name == 'nt' else 'npx') or 'npx'
+        # Environment for the Expo dev server, computed once and never mutated.
+        # Note: We don't set CI=1 because it makes Expo think it's in non-interactive mode
+        # but Expo still needs to ask for input in some cases, causing errors.
+        # Instead, we check port availability beforehand and pipe "yes" to handle any prompts.
+        self._expo_env = {key: value for key, value in os.environ.items() if key != 'CI'}
+        self._expo_env.update({
+            'EXPO_NO_TELEMETRY': '1',  # Disable telemetry
+            'EXPO_DEVTOOLS_LISTEN_ADDRESS': '0.0.0.0',  # Allow external connections
+            'REACT_NATIVE_PACKAGER_HOSTNAME': '0.0.0.0',  # Metro bundler hostname
+            'EXPO_NO_DOTENV': '1',  # Disable .env file loading to avoid conflicts
+            'EXPO_NO_GIT_STATUS': '1',  # Disable git status check
+        })
+        self._expo_envs_by_node_path: Dict[str, dict] = {}
+        # In-flight deduplicated commands keyed by (command, cwd)
+        self._inflight = SingleFlight()
         logger.info(f"CommandExecutor initialized with default timeout: {default_timeout}s")
+        logger.debug(
+            "subprocess fast paths: vfork=%s posix_spawn=%s",
+            getattr(subprocess, '_USE_VFORK', False),
+            getattr(subprocess, '_USE_POSIX_SPAWN', False)
+        )
     
     async def run_command(
         self,
-        command: str,
+        command: Union[str, List[str]],
         cwd: str,
         timeout: Optional[int] = None,
-        env: Optional[dict] = None
+        env: Optional[dict] = None,
+        dedupe: bool = False
     ) -> CommandResult:
         """
-        Execute shell command with timeout and error capture
+        Execute command with timeout and error capture
         
         Args:
-            command: Command string to execute
+            command: Argument list to exec directly. A command string is
+                split with shlex and exec'd the same way; shell operators
+                such as ``&&`` or redirections are not supported.
             cwd: Working directory for command execution
             timeout: Optional timeout in seconds (uses default if None)
             env: Optional environment variables
+            dedupe: Share the result of an identical command already running
+                in the same cwd instead of spawning a second process
             
         Returns:
             CommandResult with execution details
@@ -63,104 +179,446 @@ class CommandExecutor:
         if timeout is None:
             timeout = self.default_timeout
         
-        # Validate command doesn't contain dangerous patterns
-        # Only allow safe npm/npx commands
-        allowed_commands = ['npm', 'npx', 'expo', 'node']
-        command_parts = command.split()
-        if command_parts and command_parts[0] not in allowed_commands:
-            logger.error(f"Attempted to run disallowed command: {command_parts[0]}")
-            raise CommandExecutionError(
-                f"Command not allowed: {command_parts[0]}. "
-                f"Only {', '.join(allowed_commands)} commands are permitted."
-            )
+        command = self._prepare_command(command)
+        if dedupe:
+            return await self._execute_deduped(command, cwd, timeout, env)
+        return await self._spawn_and_collect(command, cwd, timeout, env)
+    
+    async def run_many(
+        self,
+        specs: List[dict],
+        max_parallel: Optional[int] = None
+    ) -> List[Union[CommandResult, BaseException]]:
+        """
+        Run independent commands concurrently
+        
+        Args:
+            specs: run_command keyword arguments, one dict per command
+            max_parallel: Concurrency limit (defaults to the usable CPU count)
+            
+        Returns:
+            Results in the order of specs; a failed command's exception is
+            returned in its slot instead of being raised
+        """
+        if not specs:
+            return []
+        
+        if max_parallel is None:
+            # os.process_cpu_count (3.13+) respects CPU affinity; fall back on older Pythons
+            cpu_count = getattr(os, 'process_cpu_count', os.cpu_count)
+            max_parallel = cpu_count() or 4
+        semaphore = asyncio.Semaphore(min(len(specs), max_parallel))
+        
+        async def run_one(spec: dict) -> CommandResult:
+            async with semaphore:
+                return await self.run_command(**spec)
+        
+        return await asyncio.gather(*(run_one(spec) for spec in specs), return_exceptions=True)
+    
+    async def npm_install(
+        self,
+        cwd: str,
+        *packages: str,
+        legacy_peer_deps: bool = False,
+        timeout: Optional[int] = None
+    ) -> CommandResult:
+        """
+        Run ``npm install`` (optionally for specific packages)
+        
+        Args:
+            cwd: Project directory
+            *packages: Package specs to install; all dependencies if empty
+            legacy_peer_deps: Pass ``--legacy-peer-deps``
+            timeout: Optional timeout in seconds (uses default if None)
+            
+        Returns:
+            CommandResult with execution details
+        """
+        argv = [self._npm_path, "install", *packages]
+        if legacy_peer_deps:
+            argv.append("--legacy-peer-deps")
+        # Concurrent installs into the same directory would fight over
+        # node_modules and the lockfile, so they share one process
+        return await self._run_argv(argv, cwd, timeout, dedupe=True)
+    
+    async def npm_exec(
+        self,
+        cwd: str,
+        *args: str,
+        timeout: Optional[int] = None,
+        env: Optional[dict] = None
+    ) -> CommandResult:
+        """
+        Run a package binary through npx
+        
+        Args:
+            cwd: Working directory
+            *args: Package/binary name followed by its arguments
+            timeout: Optional timeout in seconds (uses default if None)
+            env: Optional environment variables
+            
+        Returns:
+            CommandResult with execution details
+        """
+        return await self._run_argv([self._npx_path, *args], cwd, timeout, env)
+    
+    async def _run_argv(
+        self,
+        argv: List[str],
+        cwd: str,
+        timeout: Optional[int] = None,
+        env: Optional[dict] = None,
+        dedupe: bool = False
+    ) -> CommandResult:
+        """
+        Exec a trusted argument list built by this class
         
-        # Validate working directory exists
-        cwd_path = Path(cwd)
-        if not cwd_path.exists():
-            logger.error(f"Working directory does not exist: {cwd}")
-            raise CommandExecutionError(f"Working directory does not exist: {cwd}")
+        The argv comes from typed parameters, so the allowlist check and
+        string parsing done by run_command are skipped.
         
-        logger.info(f"Executing command in {cwd}: {command}")
+        Args:
+            argv: Argument list, starting with the executable
+            cwd: Working directory for command execution
+            timeout: Optional timeout in seconds (uses default if None)
+            env: Optional environment variables
+            dedupe: Share the result of an identical in-flight command
+            
+        Returns:
+            CommandResult with execution details
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        if dedupe:
+            return await self._execute_deduped(argv, cwd, timeout, env)
+        return await self._spawn_and_collect(argv, cwd, timeout, env)
+    
+    async def _execute_deduped(
+        self,
+        command: List[str],
+        cwd: str,
+        timeout: int,
+        env: Optional[dict]
+    ) -> CommandResult:
+        """
+        Run a command, coalescing concurrent identical calls into one process
+        
+        The first caller for a (command, cwd) pair spawns the process; callers
+        arriving while it runs await the same result (or exception). A caller
+        being cancelled doesn't cancel the others; the process is only
+        stopped once every caller has been cancelled.
+        
+        Args:
+            command: Argument list to execute
+            cwd: Working directory for command execution
+            timeout: Timeout in seconds
+            env: Optional environment variables
+            
+        Returns:
+            CommandResult with execution details
+        """
+        key = (tuple(command), str(Path(cwd).resolve()))
+        
+        if key in self._inflight:
+            logger.info("Joining in-flight command in %s: %s", cwd, self._format_command(command))
+        return await self._inflight.do(
+            key,
+            lambda: self._spawn_and_collect(command, cwd, timeout, env)
+        )
+    
+    async def _spawn_and_collect(
+        self,
+        command: List[str],
+        cwd: str,
+        timeout: int,
+        env: Optional[dict],
+        on_line: Optional[Callable[[str], None]] = None
+    ) -> CommandResult:
+        """
+        Spawn a command and collect its output until it exits or times out
         
-        import time
-        start_time = time.time()
+        This is the single implementation behind run_command,
+        run_command_with_streaming and the typed npm helpers.
+        
+        Args:
+            command: Argument list to execute
+            cwd: Working directory for command execution
+            timeout: Timeout in seconds
+            env: Optional environment variables
+            on_line: Optional callback receiving each stdout line as it arrives
+            
+        Returns:
+            CommandResult with execution details
+            
+        Raises:
+            CommandTimeoutError: If the command runs past its timeout
+            CommandExecutionError: If the command cannot be executed
+        """
+        display = self._format_command(command)
+        
+        start_time = time.monotonic()
+        
+        # Single authoritative deadline for the whole command
+        deadline = asyncio.get_running_loop().time() + timeout
         
         try:
-            # Use subprocess.run for Windows compatibility
-            # Run in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            
-            def run_subprocess():
-                """Run subprocess synchronously"""
-                import subprocess
-                result = subprocess.run(
-                    command,
-                    cwd=cwd,
-                    shell=True,
-                    capture_output=True,
-                    timeout=timeout,
-                    env=env,
-                    text=True
-                )
-                return result
+            # Native asyncio subprocess: the event loop's selector watches the
+            # pipes, so no thread-pool worker is tied up per command
+            process = await self._spawn(command, cwd, env)
             
-            # Wait for process with timeout
+            # Wait for process until the deadline
             try:
-                result = await asyncio.wait_for(
-                    loop.run_in_executor(None, run_subprocess),
-                    timeout=timeout + 5  # Add buffer for executor
-                )
-                
-                stdout = result.stdout
-                stderr = result.stderr
-                exit_code = result.returncode
-                
+                if on_line is None:
+                    stdout_bytes, stderr_bytes = await self._run_with_deadline(
+                        process.communicate(),
+                        deadline
+                    )
+                else:
+                    # Stream stdout to the callback while stderr, which isn't
+                    # streamed, is taken in a single read to EOF
+                    stdout_buf = bytearray()
+                    _, stderr_bytes, _ = await self._run_with_deadline(
+                        asyncio.gather(
+                            self._pump_stream(process.stdout, stdout_buf, on_line),
+                            process.stderr.read(),
+                            process.wait()
+                        ),
+                        deadline
+                    )
+                    stdout_bytes = stdout_buf[-_STREAMED_STDOUT_TAIL:]
             except asyncio.TimeoutError:
                 # Timeout occurred
-                logger.error(f"Command timed out after {timeout}s: {command}")
-                duration = time.time() - start_time
-                raise CommandTimeoutError(command, timeout)
-            except subprocess.TimeoutExpired:
-                # Subprocess timeout
-                logger.error(f"Command timed out after {timeout}s: {command}")
-                duration = time.time() - start_time
-                raise CommandTimeoutError(command, timeout)
+                logger.error("Command timed out after %ss: %s", timeout, display)
+                await self._terminate_process(process)
+                raise CommandTimeoutError(display, timeout)
+            except asyncio.CancelledError:
+                # Caller no longer wants the result; don't orphan the child
+                await self._terminate_process(process)
+                raise
             
-            duration = time.time() - start_time
+            stdout = stdout_bytes.decode('utf-8', errors='replace')
+            exit_code = process.returncode
+            
+            duration = time.monotonic() - start_time
             
             # Determine success based on exit code
             success = exit_code == 0
-            
-            # Log result
-            if success:
-                logger.info(
-                    f"Command completed successfully in {duration:.2f}s: {command}"
-                )
-            else:
-                logger.error(
-                    f"Command failed with exit code {exit_code} "
-                    f"after {duration:.2f}s: {command}"
-                )
-                logger.error(f"stderr: {stderr[:500]}")  # Log first 500 chars of stderr
-            
-            return CommandResult(
+            result = CommandResult(
                 success=success,
                 exit_code=exit_code,
                 stdout=stdout,
-                stderr=stderr,
+                stderr=stderr_bytes.decode('utf-8', errors='replace'),
                 duration=duration
             )
+            self._log_result(display, cwd, result)
+            return result
             
         except CommandExecutionError:
             # Re-raise our custom errors
             raise
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(f"Unexpected error executing command: {str(e)}")
+            duration = time.monotonic() - start_time
+            logger.error("Unexpected error executing command: %s", e)
             raise CommandExecutionError(
                 f"Failed to execute command: {str(e)}"
             )
     
+    def _log_result(self, display: str, cwd: str, result: CommandResult) -> None:
+        """
+        Emit the single log record summarizing a finished command
+        
+        Args:
+            display: Command as shown in logs
+            cwd: Working directory the command ran in
+            result: Finished command (first 500 chars of stderr are logged on failure)
+        """
+        if result.success:
+            logger.info("Command succeeded in %.2fs (cwd=%s): %s", result.duration, cwd, display)
+        elif logger.isEnabledFor(logging.ERROR):
+            logger.error(
+                "Command failed with exit code %s after %.2fs (cwd=%s): %s\nstderr: %s",
+                result.exit_code, result.duration, cwd, display, result.stderr[:500]
+            )
+    
+    def _prepare_command(self, command: Union[str, List[str]]) -> List[str]:
+        """
+        Validate a caller-supplied command and turn it into an argument list
+        
+        Command strings are split with shlex so they can be exec'd without
+        an intermediate shell. npm/npx resolve to the paths found at startup.
+        
+        Args:
+            command: Command string or argument list
+            
+        Returns:
+            Argument list ready to exec
+            
+        Raises:
+            CommandExecutionError: If the command is not allowed or needs a shell
+        """
+        self._validate_command(command)
+        
+        if isinstance(command, str):
+            try:
+                argv = shlex.split(command)
+            except ValueError as e:
+                raise CommandExecutionError(f"Malformed command: {e}")
+            if not _SHELL_OPERATORS.isdisjoint(argv):
+                logger.error("Rejected command with shell syntax: %s", command)
+                raise CommandExecutionError(
+                    "Shell operators are not supported; run each command separately"
+                )
+        else:
+            argv = list(command)
+        if not argv:
+            raise CommandExecutionError("Empty command")
+        
+        if argv[0] == 'npm':
+            argv[0] = self._npm_path
+        elif argv[0] == 'npx':
+            argv[0] = self._npx_path
+        return argv
+    
+    def _validate_command(self, command: Union[str, List[str]]) -> None:
+        """
+        Ensure a command starts with an allowed executable
+        
+        Only the first token is inspected, so long argument lists are never
+        fully tokenized just for this check. For argument lists the executable
+        may be a resolved path (e.g. ``C:\\...\\npm.cmd``); its stem is checked.
+        
+        Args:
+            command: Command string or argument list to validate
+            
+        Raises:
+            CommandExecutionError: If the executable is not allowed
+        """
+        if isinstance(command, str):
+            parts = command.split(None, 1)
+            head = parts[0] if parts else ''
+        else:
+            head = Path(command[0]).stem.lower() if command else ''
+        if head and head not in _ALLOWED_COMMANDS:
+            logger.error(f"Attempted to run disallowed command: {head}")
+            raise CommandExecutionError(
+                f"Command not allowed: {head}. "
+                f"Only {', '.join(sorted(_ALLOWED_COMMANDS))} commands are permitted."
+            )
+    
+    async def _run_with_deadline(self, awaitable, deadline: float):
+        """
+        Await with a timeout derived from an absolute event-loop deadline
+        
+        Uses asyncio.timeout_at rather than wait_for, so no extra Task is
+        created and cancellation reaches the awaitable directly.
+        
+        Args:
+            awaitable: Coroutine or future to wait for
+            deadline: Absolute deadline in event-loop time (loop.time())
+            
+        Returns:
+            Result of the awaitable
+            
+        Raises:
+            asyncio.TimeoutError: If the deadline passes first
+        """
+        async with asyncio.timeout_at(deadline):
+            return await awaitable
+    
+    async def _terminate_process(
+        self,
+        process: asyncio.subprocess.Process,
+        grace_period: float = 2.0
+    ) -> None:
+        """
+        Stop a process and its group, escalating to a kill after a grace period
+        
+        Args:
+            process: Process to stop
+            grace_period: Seconds to wait for a clean exit before killing
+        """
+        if process.returncode is not None:
+            return
+        try:
+            self._signal_process_group(process, force=False)
+            try:
+                async with asyncio.timeout(grace_period):
+                    await process.wait()
+            except asyncio.TimeoutError:
+                self._signal_process_group(process, force=True)
+                await process.wait()
+        except ProcessLookupError:
+            # Already exited
+            pass
+    
+    def _signal_process_group(self, process, force: bool) -> None:
+        """
+        Signal the process group led by a child started with _SPAWN_KWARGS
+        
+        On POSIX this is SIGTERM (or SIGKILL when forced) to the whole group.
+        On Windows it is CTRL_BREAK_EVENT to the group, or a kill of the child.
+        If the child somehow shares our own group, only the child is signalled.
+        
+        Args:
+            process: Process to signal
+            force: Kill instead of asking the process to exit
+        """
+        if os.name == 'nt':
+            if force:
+                process.kill()
+            else:
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+            return
+        
+        pgid = os.getpgid(process.pid)
+        if pgid == os.getpgrp():
+            # Never signal our own group
+            if force:
+                process.kill()
+            else:
+                process.terminate()
+            return
+        os.killpg(pgid, signal.SIGKILL if force else signal.SIGTERM)
+    
+    def _format_command(self, command: List[str]) -> str:
+        """Render an argument list for logs and errors"""
+        return shlex.join(command)
+    
+    async def _spawn(
+        self,
+        argv: List[str],
+        cwd: str,
+        env: Optional[dict]
+    ) -> asyncio.subprocess.Process:
+        """
+        Exec an argument list with piped stdout/stderr
+        
+        There is no shell in between, so nothing in argv is interpreted and
+        each command costs a single process creation.
+        
+        Args:
+            argv: Argument list, starting with the executable
+            cwd: Working directory for command execution
+            env: Optional environment variables
+            
+        Returns:
+            Running asyncio subprocess
+            
+        Raises:
+            CommandExecutionError: If cwd or the executable does not exist
+        """
+        try:
+            return await asyncio.create_subprocess_exec(
+                *argv,
+                cwd=cwd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=_STREAM_LIMIT,
+                **_SPAWN_KWARGS
+            )
+        except (FileNotFoundError, NotADirectoryError) as e:
+            raise _spawn_error(e, cwd) from e
+    
     async def create_expo_project(
         self,
         parent_dir: str,
@@ -183,11 +641,12 @@ class CommandExecutor:
         """
         logger.info(f"Creating Expo project '{app_name}' in {parent_dir}")
         
-        # Create Expo project using npx create-expo-app and cd into it
+        # Create Expo project using npx create-expo-app
         # Increased timeout to 600 seconds (10 minutes) for slower connections
-        create_result = await self.run_command(
-            command=f"npx create-expo-app@latest {app_name} && cd {app_name}",
-            cwd=parent_dir,
+        create_result = await self.npm_exec(
+            parent_dir,
+            "create-expo-app@latest",
+            app_name,
             timeout=timeout or 600  # 10 minutes for project creation
         )
         
@@ -212,7 +671,7 @@ class CommandExecutor:
         
         This includes:
         1. Installing dependencies with npm install
-        2. Verifying Expo CLI availability
+        2. Verifying Expo CLI availability (in parallel with step 1)
         
         Args:
             project_dir: Project directory path (must already exist with package.json)
@@ -227,26 +686,95 @@ class CommandExecutor:
         """
         logger.info(f"Starting Expo project setup in {project_dir} on port {port}")
         
-        project_path = Path(project_dir)
-        package_json = project_path / "package.json"
-        
-        # Verify package.json exists
-        if not package_json.exists():
+        # Verify package.json exists. One directory listing answers this and
+        # also tells later steps what else is already in the project.
+        own_node_modules = False
+        try:
+            with os.scandir(project_dir) as entries:
+                project_files = set()
+                for entry in entries:
+                    project_files.add(entry.name)
+                    if entry.name == "node_modules":
+                        # A pooled symlink wasn't installed by this project
+                        own_node_modules = entry.is_dir(follow_symlinks=False)
+        except (FileNotFoundError, NotADirectoryError):
+            project_files = set()
+        if "package.json" not in project_files:
             logger.error(f"package.json not found in {project_dir}")
             raise CommandExecutionError(
                 "Project must have package.json before setup. "
                 "Ensure project was created with create-expo-app."
             )
         
-        # Step 1: Install dependencies
-        logger.info("Installing npm dependencies...")
-        install_result = await self.run_command(
-            command="npm install",
-            cwd=project_dir,
-            timeout=timeout or 600  # 10 minutes for npm install
+        # Step 1: Install dependencies, checking the Expo CLI alongside since
+        # the check only needs package.json
+        expo_check_task = asyncio.create_task(
+            self.npm_exec(project_dir, "expo", "--version", timeout=30)
         )
+        install_hash = None
+        if "package-lock.json" in project_files and own_node_modules:
+            install_hash = self._install_fingerprint(project_dir)
+        if install_hash is not None and install_hash == self._read_install_marker(project_dir):
+            # node_modules was installed from exactly these manifests by an
+            # earlier setup, so npm install would change nothing
+            logger.info("node_modules matches package-lock.json, skipping npm install")
+        else:
+            logger.info("Installing npm dependencies and verifying Expo CLI...")
+            await self._install_dependencies(project_dir, timeout, expo_check_task)
+        
+        # Step 2: Verify expo CLI is available. The early check can miss if expo
+        # only becomes resolvable once node_modules is populated, so retry once.
+        expo_check = (await asyncio.gather(expo_check_task, return_exceptions=True))[0]
+        if isinstance(expo_check, BaseException) or not expo_check.success:
+            logger.info("Re-checking Expo CLI after install...")
+            expo_check = await self.npm_exec(project_dir, "expo", "--version", timeout=30)
+        
+        if not expo_check.success:
+            logger.error("Expo CLI not available")
+            raise CommandExecutionError(
+                "Expo CLI is not available. Ensure expo is installed."
+            )
+        
+        logger.info(f"Expo project setup completed for {project_dir}")
+        logger.info(f"To start the server, run: npm start")
+        return True
+    
+    async def _install_dependencies(
+        self,
+        project_dir: str,
+        timeout: Optional[int],
+        expo_check_task: asyncio.Task
+    ) -> None:
+        """
+        Run npm install plus the 'send' workaround, then record the install
+        
+        Args:
+            project_dir: Project directory path
+            timeout: Optional timeout for npm install
+            expo_check_task: Concurrent Expo CLI check, cancelled if install fails
+            
+        Raises:
+            DependencyInstallError: If npm install fails
+        """
+        # A node_modules linked from the shared pool is used by other projects;
+        # unlink it so npm installs into a directory this project owns
+        node_modules = os.path.join(project_dir, 'node_modules')
+        if os.path.islink(node_modules):
+            logger.info("Unlinking pooled node_modules in %s before install", project_dir)
+            os.unlink(node_modules)
+        
+        try:
+            install_result = await self.npm_install(
+                project_dir,
+                timeout=timeout or 600  # 10 minutes for npm install
+            )
+        except BaseException:
+            # Setup is failing anyway; don't leave the check running
+            expo_check_task.cancel()
+            raise
         
         if not install_result.success:
+            expo_check_task.cancel()
             logger.error(f"npm install failed: {install_result.stderr}")
             raise DependencyInstallError(
                 f"Failed to install dependencies: {install_result.stderr[:200]}"
@@ -256,9 +784,9 @@ class CommandExecutor:
         
         # Step 1.5: Install missing 'send' module (Expo CLI dependency issue workaround)
         logger.info("Installing 'send' module (Expo CLI dependency)...")
-        send_install = await self.run_command(
-            command="npm install send",
-            cwd=project_dir,
+        send_install = await self.npm_install(
+            project_dir,
+            "send",
             timeout=60  # 1 minute for single package
         )
         
@@ -267,24 +795,47 @@ class CommandExecutor:
             # Don't fail the whole setup, just log warning
         else:
             logger.info("'send' module installed successfully")
+            # Fingerprint the manifests as left by both installs
+            self._write_install_marker(project_dir)
+    
+    def _install_fingerprint(self, project_dir: str) -> Optional[str]:
+        """
+        Hash package.json and package-lock.json together
         
-        # Step 2: Verify expo CLI is available
-        logger.info("Verifying Expo CLI...")
-        expo_check = await self.run_command(
-            command="npx expo --version",
-            cwd=project_dir,
-            timeout=30
-        )
-        
-        if not expo_check.success:
-            logger.error("Expo CLI not available")
-            raise CommandExecutionError(
-                "Expo CLI is not available. Ensure expo is installed."
-            )
-        
-        logger.info(f"Expo project setup completed for {project_dir}")
-        logger.info(f"To start the server, run: npm start")
-        return True
+        Args:
+            project_dir: Project directory path
+            
+        Returns:
+            Hex digest, or None if either file can't be read
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            for name in ("package.json", "package-lock.json"):
+                with open(os.path.join(project_dir, name), 'rb') as f:
+                    digest.update(f.read())
+        except OSError:
+            return None
+        return digest.hexdigest()
+    
+    def _read_install_marker(self, project_dir: str) -> Optional[str]:
+        """Return the fingerprint recorded by the last completed install, if any"""
+        try:
+            with open(os.path.join(project_dir, _INSTALL_MARKER), encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    
+    def _write_install_marker(self, project_dir: str) -> None:
+        """Record the current manifest fingerprint in the project directory"""
+        install_hash = self._install_fingerprint(project_dir)
+        if install_hash is None:
+            return
+        try:
+            with open(os.path.join(project_dir, _INSTALL_MARKER), 'w', encoding='utf-8') as f:
+                f.write(install_hash)
+        except OSError as e:
+            # Only costs a redundant install next time
+            logger.debug("Could not write install marker: %s", e)
     
     async def _ensure_send_module_installed(self, global_node_modules_path: Path) -> None:
         """
@@ -307,9 +858,10 @@ class CommandExecutor:
         global_package_dir = global_node_modules_path.parent
         
         try:
-            install_result = await self.run_command(
-                command="npm install send@^0.18.0 --legacy-peer-deps",
-                cwd=str(global_package_dir),
+            install_result = await self.npm_install(
+                str(global_package_dir),
+                "send@^0.18.0",
+                legacy_peer_deps=True,
                 timeout=120  # 2 minutes
             )
             
@@ -332,17 +884,44 @@ class CommandExecutor:
         Returns:
             True if port is listening, False otherwise
         """
-        import socket
+        # Raw non-blocking connect on the event loop: no transport or stream
+        # objects are built just to be closed again
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.setblocking(False)
+            try:
+                async with asyncio.timeout(0.5):
+                    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+                return True
+            except (OSError, asyncio.TimeoutError) as e:
+                logger.debug("Port check failed: %s", e)
+                return False
+    
+    def _new_probe_socket(self) -> socket.socket:
+        """Create a socket for bind-based port availability probes"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        return sock
+    
+    def _try_bind(self, sock: socket.socket, port: int) -> bool:
+        """
+        Try binding an unbound probe socket to a port
         
+        bind() never blocks, and a failed bind leaves the socket unbound, so
+        the same socket can be used to probe further ports.
+        
+        Args:
+            sock: Unbound probe socket
+            port: Port number to probe
+            
+        Returns:
+            True if the bind succeeded (port is available)
+        """
         try:
-            # Try to connect to the port
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('localhost', port))
-            sock.close()
-            return result == 0
-        except Exception as e:
-            logger.debug(f"Port check failed: {e}")
+            sock.bind(('127.0.0.1', port))
+            return True
+        except OSError as e:
+            # Port is in use (errno 10048 on Windows, 98 on Linux)
+            logger.debug("Port %s is not available: %s", port, e)
             return False
     
     async def _is_port_available(self, port: int) -> bool:
@@ -355,32 +934,12 @@ class CommandExecutor:
         Returns:
             True if port is available, False otherwise
         """
-        import socket
-        
-        sock = None
         try:
-            # Try to bind to the port - if successful, port is available
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.settimeout(1)
-            try:
-                sock.bind(('127.0.0.1', port))
-                # Port is available
-                return True
-            except OSError as e:
-                # Port is in use (errno 10048 on Windows, 98 on Linux)
-                logger.debug(f"Port {port} is not available: {e}")
-                return False
+            with self._new_probe_socket() as sock:
+                return self._try_bind(sock, port)
         except Exception as e:
-            logger.debug(f"Port availability check failed: {e}")
+            logger.debug("Port availability check failed: %s", e)
             return False
-        finally:
-            # Make sure socket is closed
-            if sock:
-                try:
-                    sock.close()
-                except:
-                    pass
     
     async def _find_available_port(self, start_port: int, max_attempts: int = 10) -> int:
         """
@@ -396,11 +955,13 @@ class CommandExecutor:
         Raises:
             CommandExecutionError: If no available port found
         """
-        for offset in range(max_attempts):
-            port = start_port + offset
-            if await self._is_port_available(port):
-                logger.info(f"Found available port: {port}")
-                return port
+        # One probe socket for the whole scan; it is only bound on success
+        with self._new_probe_socket() as sock:
+            for offset in range(max_attempts):
+                port = start_port + offset
+                if self._try_bind(sock, port):
+                    logger.info(f"Found available port: {port}")
+                    return port
         
         raise CommandExecutionError(
             f"Could not find available port starting from {start_port} after {max_attempts} attempts"
@@ -409,7 +970,8 @@ class CommandExecutor:
     async def start_expo_server(
         self,
         project_dir: str,
-        port: int
+        port: int,
+        env_overlay: Optional[dict] = None
     ) -> asyncio.subprocess.Process:
         """
         Start Expo development server as a background process
@@ -417,6 +979,7 @@ class CommandExecutor:
         Args:
             project_dir: Project directory path
             port: Port number for Expo server
+            env_overlay: Optional environment variables to add or override
             
         Returns:
             Process handle for the running Expo server
@@ -424,49 +987,29 @@ class CommandExecutor:
         Raises:
             CommandExecutionError: If server fails to start
         """
-        logger.info(f"Starting Expo server in {project_dir} on port {port}")
-        
-        project_path = Path(project_dir)
-        
-        # Verify project directory exists
-        if not project_path.exists():
-            logger.error(f"Project directory not found: {project_dir}")
-            raise CommandExecutionError(f"Project directory does not exist: {project_dir}")
+        logger.info("Starting Expo server in %s on port %s", project_dir, port)
         
+        process = None
         try:
             # Check if the requested port is available
             if not await self._is_port_available(port):
-                logger.warning(f"Port {port} is not available, finding alternative port...")
+                logger.warning("Port %s is not available, finding alternative port...", port)
                 # Find an available port near the requested one
                 port = await self._find_available_port(port, max_attempts=10)
-                logger.info(f"Using alternative port: {port}")
+                logger.info("Using alternative port: %s", port)
             
             # Start Expo server using npx expo start with explicit port
             # This avoids port conflicts and interactive prompts
-            import sys
-            import os
-            
-            # Set environment variables to enable hot reload
-            # Note: We don't set CI=1 because it makes Expo think it's in non-interactive mode
-            # but Expo still needs to ask for input in some cases, causing errors.
-            # Instead, we check port availability beforehand and pipe "yes" to handle any prompts.
-            env = os.environ.copy()
-            # Remove CI if it's set, to allow Expo to handle prompts properly
-            if 'CI' in env:
-                del env['CI']
-            env['EXPO_NO_TELEMETRY'] = '1'  # Disable telemetry
-            env['EXPO_DEVTOOLS_LISTEN_ADDRESS'] = '0.0.0.0'  # Allow external connections
-            env['REACT_NATIVE_PACKAGER_HOSTNAME'] = '0.0.0.0'  # Metro bundler hostname
-            env['EXPO_NO_DOTENV'] = '1'  # Disable .env file loading to avoid conflicts
-            env['EXPO_NO_GIT_STATUS'] = '1'  # Disable git status check
+            
+            # Base Expo environment is built once in __init__; only per-call
+            # additions are merged into a new dict
+            env = self._expo_env
+            if env_overlay:
+                env = {**env, **env_overlay}
             
             # Add NODE_PATH to use global shared node_modules
             # Try to get path from settings, fallback to default
-            try:
-                from config import settings
-                base_dir = settings.projects_base_dir
-            except:
-                base_dir = "/tmp/projects"
+            base_dir = _settings.projects_base_dir if _settings is not None else "/tmp/projects"
             
             global_node_modules_path = Path(base_dir).parent / "shared_node_modules" / "global" / "node_modules"
             
@@ -475,244 +1018,105 @@ class CommandExecutor:
                 global_node_modules_path = Path("/tmp/shared_node_modules/global/node_modules")
             
             if global_node_modules_path.exists():
-                env['NODE_PATH'] = str(global_node_modules_path)
-                logger.info(f"Using global node_modules: {global_node_modules_path}")
+                node_path = str(global_node_modules_path)
+                if env_overlay:
+                    env = {**env, 'NODE_PATH': node_path}
+                else:
+                    # The shared node_modules path rarely changes; reuse its env too
+                    env = self._expo_envs_by_node_path.get(node_path)
+                    if env is None:
+                        env = {**self._expo_env, 'NODE_PATH': node_path}
+                        self._expo_envs_by_node_path[node_path] = env
+                logger.info("Using global node_modules: %s", global_node_modules_path)
                 
                 # Ensure 'send' module is installed in global node_modules (required by Expo CLI)
                 await self._ensure_send_module_installed(global_node_modules_path)
             else:
-                logger.warning(f"Global node_modules not found at {global_node_modules_path}, NODE_PATH not set")
-            
-            if sys.platform == 'win32':
-                # Windows: Ensure ProactorEventLoop is set for subprocess support
-                loop = asyncio.get_event_loop()
-                if not isinstance(loop, asyncio.ProactorEventLoop):
-                    logger.warning("Current event loop is not ProactorEventLoop, setting policy...")
-                    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-                    # Note: This won't affect the current loop, but will affect new ones
-                
-                # Windows: use shell to find npx in PATH
-                # Enable web, disable tunnel (we use ngrok), enable LAN access
-                # Since port is already checked and available, Expo shouldn't ask for confirmation
-                # But we'll use stdin to handle any prompts that might occur
-                cmd = f'npx --yes expo start --port {port} --web --lan'
-                logger.info(f"Starting Expo with command: {cmd}")
-                logger.info(f"Working directory: {project_dir}")
-                
-                try:
-                    # Use subprocess.Popen wrapped in executor for Windows compatibility
-                    import subprocess
-                    from concurrent.futures import ThreadPoolExecutor
-                    import threading
-                    
-                    def create_process():
-                        """Create subprocess using Popen (Windows compatible)"""
-                        # Create process with stdin=PIPE so we can send input if needed
-                        process = subprocess.Popen(
-                            cmd,
-                            cwd=project_dir,
-                            shell=True,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            stdin=subprocess.PIPE,
-                            env=env,
-                            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0,
-                            text=True,  # Use text mode for stdin
-                            bufsize=1  # Line buffered
-                        )
-                        
-                        # Start a background thread to send "yes" if Expo asks for input
-                        def send_yes():
-                            """Send 'yes' to stdin after a short delay"""
-                            import time
-                            time.sleep(0.5)  # Wait a bit for Expo to start
-                            try:
-                                # Send "yes" multiple times to handle any prompts
-                                for _ in range(3):
-                                    if process.stdin and not process.stdin.closed:
-                                        process.stdin.write("yes\n")
-                                        process.stdin.flush()
-                                        time.sleep(0.1)
-                            except:
-                                pass  # Ignore if stdin is closed
-                        
-                        # Start thread to handle prompts
-                        prompt_thread = threading.Thread(target=send_yes, daemon=True)
-                        prompt_thread.start()
-                        
-                        return process
-                    
-                    # Create process in thread pool to avoid blocking
-                    with ThreadPoolExecutor() as executor:
-                        popen_process = await loop.run_in_executor(executor, create_process)
-                    
-                    # Wrap Popen process to make it compatible with asyncio.subprocess.Process
-                    class ProcessWrapper:
-                        def __init__(self, popen_proc):
-                            self.popen_proc = popen_proc
-                            self.pid = popen_proc.pid
-                            self.returncode = popen_proc.returncode
-                            # Expose stdout and stderr for reading
-                            self.stdout = popen_proc.stdout
-                            self.stderr = popen_proc.stderr
-                            
-                        async def communicate(self):
-                            """Read stdout and stderr"""
-                            loop = asyncio.get_event_loop()
-                            stdout, stderr = await loop.run_in_executor(None, self.popen_proc.communicate)
-                            return stdout, stderr
-                        
-                        def kill(self):
-                            """Kill the process"""
-                            try:
-                                self.popen_proc.kill()
-                            except:
-                                pass
-                    
-                    process = ProcessWrapper(popen_process)
-                    logger.info(f"Process created successfully with PID {process.pid}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to create subprocess: {type(e).__name__}: {str(e)}")
-                    raise CommandExecutionError(
-                        f"Failed to create Expo process: {type(e).__name__}: {str(e) or 'Process creation failed'}"
-                    )
-            else:
-                # Unix: use exec with stdin=PIPE to handle prompts
+                logger.warning("Global node_modules not found at %s, NODE_PATH not set", global_node_modules_path)
+            
+            # Enable web, disable tunnel (we use ngrok), enable LAN access
+            # Since port is already checked and available, Expo shouldn't ask for confirmation
+            # But we'll use stdin to handle any prompts that might occur.
+            # The same native asyncio path serves Windows too: its default
+            # ProactorEventLoop supports subprocesses (see module import).
+            try:
                 process = await asyncio.create_subprocess_exec(
-                    "npx",
-                    "--yes",
-                    "expo",
-                    "start",
-                    "--port",
-                    str(port),
-                    "--web",
-                    "--lan",
+                    *self._expo_start_argv(port),
                     cwd=project_dir,
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE,
                     stdin=asyncio.subprocess.PIPE,
-                    env=env
-                )
-                
-                # Send "yes" in background to handle any prompts
-                async def send_yes_async():
-                    """Send 'yes' to stdin after a short delay"""
-                    await asyncio.sleep(0.5)
-                    try:
-                        for _ in range(3):
-                            if process.stdin and not process.stdin.closed:
-                                process.stdin.write(b"yes\n")
-                                await process.stdin.drain()
-                                await asyncio.sleep(0.1)
-                    except:
-                        pass  # Ignore if stdin is closed
-                
-                # Start background task to handle prompts
-                asyncio.create_task(send_yes_async())
-            
-            logger.info(f"Expo server process started with PID {process.pid}")
-            
-            # Give process a moment to start
-            await asyncio.sleep(1)
-            
-            # Check if process crashed immediately
-            # Update returncode for wrapper
-            if hasattr(process, 'popen_proc'):
-                process.returncode = process.popen_proc.poll()
-            
-            if process.returncode is not None:
-                stdout, stderr = await process.communicate()
-                # Handle both bytes and strings (Windows uses text=True, Unix uses bytes)
-                stdout_text = stdout if isinstance(stdout, str) else (stdout.decode('utf-8', errors='ignore') if stdout else "")
-                stderr_text = stderr if isinstance(stderr, str) else (stderr.decode('utf-8', errors='ignore') if stderr else "")
-                logger.error(f"Expo server crashed immediately. Exit code: {process.returncode}")
-                logger.error(f"stdout: {stdout_text[:500] if stdout_text else 'None'}")
-                logger.error(f"stderr: {stderr_text[:500] if stderr_text else 'None'}")
-                raise CommandExecutionError(
-                    f"Expo server crashed immediately (exit code {process.returncode}). "
-                    f"Error: {stderr_text[:200] if stderr_text else stdout_text[:200] if stdout_text else 'No error output'}"
+                    env=env,
+                    limit=_STREAM_LIMIT,
+                    **_SPAWN_KWARGS
                 )
+            except (FileNotFoundError, NotADirectoryError) as e:
+                raise _spawn_error(e, project_dir) from e
+            
+            # Answer a possible Yes/No prompt up front: the answer sits in the
+            # pipe until Expo reads it. Later prompts would be fatal config
+            # errors anyway, so stdin is closed rather than kept open.
+            process.stdin.write(b"yes\n")
+            process.stdin.close()
             
-            # Wait for server to be ready (check if port is listening)
-            logger.info(f"Waiting for Expo server to be ready on port {port}...")
+            # Drain stdout/stderr for the life of the process so a chatty
+            # Metro bundler never blocks on a full pipe
+            self._attach_output_drainers(process)
+            
+            logger.info("Expo server process started with PID %s", process.pid)
+            
+            # Wait for server to be ready. The stdout drainer sets process.ready
+            # when Expo prints its "waiting on" banner, and exit wakes us too,
+            # so startup is noticed the moment it happens. A sparse port probe
+            # covers Expo versions whose banner doesn't match.
+            logger.info("Waiting for Expo server to be ready on port %s...", port)
             max_wait = 60  # Wait up to 60 seconds
-            wait_interval = 2  # Check every 2 seconds
+            loop = asyncio.get_running_loop()
+            wait_started = loop.time()
+            deadline = wait_started + max_wait
+            delay = 0.25  # Back off from 250ms up to 2s between fallback probes
+            ready_wait = asyncio.ensure_future(process.ready.wait())
+            exit_wait = asyncio.ensure_future(process.wait())
             
-            for attempt in range(max_wait // wait_interval):
-                await asyncio.sleep(wait_interval)
-                
-                # Check if process is still running
-                # Update returncode for wrapper
-                if hasattr(process, 'popen_proc'):
-                    process.returncode = process.popen_proc.poll()
-                
-                if process.returncode is not None:
-                    # Process terminated during startup
-                    stdout, stderr = await process.communicate()
-                    # Handle both bytes and strings (Windows uses text=True, Unix uses bytes)
-                    stdout_text = stdout if isinstance(stdout, str) else (stdout.decode('utf-8', errors='ignore') if stdout else "")
-                    stderr_text = stderr if isinstance(stderr, str) else (stderr.decode('utf-8', errors='ignore') if stderr else "")
-                    logger.error(f"Expo server terminated during startup: {stderr_text}")
-                    raise CommandExecutionError(
-                        f"Expo server terminated: {stderr_text[:200] if stderr_text else stdout_text[:200] if stdout_text else 'No error output'}"
+            try:
+                while loop.time() < deadline:
+                    await asyncio.wait(
+                        (ready_wait, exit_wait),
+                        timeout=min(delay, deadline - loop.time()),
+                        return_when=asyncio.FIRST_COMPLETED
                     )
-                
-                # Check if port is listening
-                if await self._is_port_listening(port):
-                    logger.info(f"Expo server is ready on port {port} (took {(attempt + 1) * wait_interval}s)")
-                    return process
+                    
+                    # Check if process is still running
+                    if process.returncode is not None:
+                        # Process terminated during startup
+                        stdout_text, stderr_text = await self._read_process_output(process)
+                        logger.error(
+                            "Expo server terminated during startup. Exit code: %s\nstdout: %s\nstderr: %s",
+                            process.returncode, stdout_text[:500] or 'None', stderr_text[:500] or 'None'
+                        )
+                        raise CommandExecutionError(
+                            f"Expo server terminated during startup (exit code {process.returncode}). "
+                            f"Error: {(stderr_text or stdout_text)[:200] or 'No error output'}"
+                        )
+                    
+                    if ready_wait.done() or await self._is_port_listening(port):
+                        logger.info("Expo server is ready on port %s (took %.1fs)", port, loop.time() - wait_started)
+                        return process
+                    
+                    delay = min(delay * 2, 2.0)
+            finally:
+                ready_wait.cancel()
+                exit_wait.cancel()
             
             # Timeout - server didn't start in time
-            logger.error(f"Expo server did not start within {max_wait} seconds")
-            # Try to get error output before killing (but don't fail if we can't read it)
-            error_output = ""
-            try:
-                # For Windows ProcessWrapper, try to read synchronously from the underlying process
-                if hasattr(process, 'popen_proc'):
-                    # Windows: read from Popen process directly if available
-                    try:
-                        if process.popen_proc.stderr and not process.popen_proc.stderr.closed:
-                            # Peek at stderr if available (non-blocking)
-                            import select
-                            import sys
-                            if sys.platform == 'win32':
-                                # On Windows, we can't easily peek without blocking
-                                # Just log that we timed out
-                                pass
-                            else:
-                                # Unix: try to read
-                                if select.select([process.popen_proc.stderr], [], [], 0.1)[0]:
-                                    stderr_data = process.popen_proc.stderr.read(1024)
-                                    if stderr_data:
-                                        if isinstance(stderr_data, str):
-                                            error_output = stderr_data
-                                        else:
-                                            error_output = stderr_data.decode('utf-8', errors='ignore')
-                    except Exception as e:
-                        logger.debug(f"Could not read stderr: {e}")
-                elif hasattr(process, 'stderr') and process.stderr:
-                    # Unix: try async read
-                    try:
-                        stderr_data = await asyncio.wait_for(process.stderr.read(1024), timeout=0.5)
-                        if stderr_data:
-                            if isinstance(stderr_data, str):
-                                error_output = stderr_data
-                            else:
-                                error_output = stderr_data.decode('utf-8', errors='ignore') if stderr_data else ""
-                    except:
-                        pass
-                
-                if error_output:
-                    logger.error(f"Expo server error output: {error_output[:500]}")
-            except Exception as e:
-                logger.debug(f"Error reading process output: {e}")
+            logger.error("Expo server did not start within %s seconds", max_wait)
+            # The drainer has been collecting stderr all along
+            error_output = '\n'.join(process.stderr_tail)
+            if error_output:
+                logger.error("Expo server error output: %s", error_output[:500])
             
-            # Kill the process
-            try:
-                process.kill()
-            except:
-                pass
+            # Stop the process group so metro/node don't linger holding the port
+            await self._stop_expo_process(process)
             
             raise CommandExecutionError(
                 f"Expo server failed to start within {max_wait} seconds. "
@@ -722,14 +1126,123 @@ class CommandExecutor:
         except CommandExecutionError:
             # Re-raise our custom errors
             raise
+        except asyncio.CancelledError:
+            # Caller gave up mid-startup; don't leave a half-started server behind
+            if process is not None:
+                await self._stop_expo_process(process)
+            raise
         except Exception as e:
-            logger.error(f"Failed to start Expo server: {str(e)}", exc_info=True)
+            logger.error("Failed to start Expo server: %s", e, exc_info=True)
+            if process is not None:
+                await self._stop_expo_process(process)
             error_msg = str(e) if str(e) else "Unknown error starting Expo server"
             raise CommandExecutionError(f"Failed to start Expo server: {error_msg}")
     
+    async def _stop_expo_process(self, process) -> None:
+        """
+        Stop an Expo server that failed to start: SIGTERM, 2s grace, then kill
+        
+        The graceful first step lets metro clean up its sockets and release the
+        port promptly, so a retry on the same port isn't blocked.
+        
+        Args:
+            process: Expo server process
+        """
+        try:
+            await self._terminate_process(process)
+        except Exception as e:
+            logger.debug("Error stopping Expo server: %s", e)
+        for task in process.drain_tasks:
+            task.cancel()
+    
+    def _expo_start_argv(self, port: int) -> List[str]:
+        """
+        Build the argv for a web + LAN Expo dev server on a port
+        
+        Args:
+            port: Port number for Expo server
+            
+        Returns:
+            Argument list for the Expo dev server
+        """
+        return [self._npx_path, '--yes', 'expo', 'start', '--port', str(port), '--web', '--lan']
+    
+    def _attach_output_drainers(self, process: asyncio.subprocess.Process) -> None:
+        """
+        Start background tasks draining a process's stdout and stderr
+        
+        The last lines of each stream are kept on the process as
+        ``stdout_tail`` / ``stderr_tail`` (bounded deques) for error reporting,
+        and the tasks as ``drain_tasks``. ``ready`` is an event set once stdout
+        shows the Expo ready banner.
+        
+        Args:
+            process: Process started with stdout and stderr pipes
+        """
+        process.stdout_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+        process.stderr_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+        process.ready = asyncio.Event()
+        process.drain_tasks = (
+            asyncio.create_task(
+                self._drain_stream(process.stdout, process.stdout_tail, "stdout", process.ready)
+            ),
+            asyncio.create_task(self._drain_stream(process.stderr, process.stderr_tail, "stderr")),
+        )
+    
+    async def _drain_stream(
+        self,
+        stream: asyncio.StreamReader,
+        tail: deque,
+        name: str,
+        ready: Optional[asyncio.Event] = None
+    ) -> None:
+        """
+        Read a stream line by line until EOF, keeping the most recent lines
+        
+        Args:
+            stream: Stream to drain
+            tail: Bounded deque receiving decoded lines
+            name: Stream name for debug logging
+            ready: Optional event to set when a line shows the Expo ready banner
+        """
+        try:
+            while True:
+                try:
+                    line = await stream.readline()
+                except ValueError:
+                    # Line longer than the reader's limit: the reader has
+                    # already discarded it, so note that and keep draining
+                    tail.append("[overlong line dropped]")
+                    continue
+                if not line:
+                    break
+                # Keep only the head of each line so a crash dumping huge
+                # lines can't make the tail grow without bound
+                line_str = line[:_OUTPUT_LINE_BYTES].decode('utf-8', errors='replace').rstrip()
+                tail.append(line_str)
+                logger.debug("Expo %s: %s", name, line_str)
+                if ready is not None and not ready.is_set() and EXPO_READY_PATTERN.search(line_str):
+                    ready.set()
+        except Exception as e:
+            logger.debug("Stopped draining %s: %s", name, e)
+    
+    async def _read_process_output(self, process) -> Tuple[str, str]:
+        """
+        Get stdout/stderr text from an exited Expo process
+        
+        Args:
+            process: Exited process with output drainers attached
+            
+        Returns:
+            Tuple of (stdout, stderr) text
+        """
+        # Let the drainers reach EOF rather than racing them with communicate()
+        await asyncio.wait(process.drain_tasks, timeout=1.0)
+        return '\n'.join(process.stdout_tail), '\n'.join(process.stderr_tail)
+    
     async def run_command_with_streaming(
         self,
-        command: str,
+        command: Union[str, List[str]],
         cwd: str,
         timeout: Optional[int] = None,
         env: Optional[dict] = None,
@@ -739,14 +1252,15 @@ class CommandExecutor:
         Execute command with real-time output streaming
         
         Args:
-            command: Command string to execute
+            command: Argument list, or a command string split with shlex
             cwd: Working directory for command execution
             timeout: Optional timeout in seconds (uses default if None)
             env: Optional environment variables
             output_callback: Optional callback function for streaming output
             
         Returns:
-            CommandResult with execution details
+            CommandResult with execution details. With a callback, stdout
+            holds only the last 64 KiB of output.
             
         Raises:
             CommandExecutionError: If command execution fails
@@ -754,118 +1268,49 @@ class CommandExecutor:
         if timeout is None:
             timeout = self.default_timeout
         
-        # Validate working directory exists
-        cwd_path = Path(cwd)
-        if not cwd_path.exists():
-            logger.error(f"Working directory does not exist: {cwd}")
-            raise CommandExecutionError(f"Working directory does not exist: {cwd}")
-        
-        logger.info(f"Executing command with streaming in {cwd}: {command}")
-        
-        import time
-        start_time = time.time()
+        command = self._prepare_command(command)
+        return await self._spawn_and_collect(command, cwd, timeout, env, on_line=output_callback)
+    
+    async def _pump_stream(
+        self,
+        stream: asyncio.StreamReader,
+        buf: bytearray,
+        output_callback: Callable[[str], None]
+    ) -> None:
+        """
+        Pass each line of a stream to a callback until EOF, keeping a tail
         
-        stdout_lines = []
-        stderr_lines = []
+        Output is read in whatever chunks the pipe has ready and split into
+        lines here, so a burst of lines costs one await rather than one each.
         
+        Args:
+            stream: Stream to read
+            buf: Buffer receiving the raw bytes; only the last
+                _STREAMED_STDOUT_TAIL bytes are guaranteed to be kept
+            output_callback: Callback invoked with each decoded line
+        """
+        partial = b''
+        while True:
+            chunk = await stream.read(_STREAM_LIMIT)
+            if not chunk:
+                break
+            buf += chunk
+            if len(buf) > 2 * _STREAMED_STDOUT_TAIL:
+                # Trim in bulk so the copy is amortized over many chunks
+                del buf[:-_STREAMED_STDOUT_TAIL]
+            *lines, partial = (partial + chunk).split(b'\n') if partial else chunk.split(b'\n')
+            for line in lines:
+                self._emit_line(line, output_callback)
+        if partial:
+            # Final line without a trailing newline
+            self._emit_line(partial, output_callback)
+    
+    def _emit_line(self, line: bytes, output_callback: Callable[[str], None]) -> None:
+        """Pass one raw output line to a callback, logging callback errors"""
         try:
-            # Use subprocess.Popen for Windows compatibility with streaming
-            loop = asyncio.get_event_loop()
-            
-            def run_subprocess_streaming():
-                """Run subprocess with streaming output"""
-                import subprocess
-                process = subprocess.Popen(
-                    command,
-                    cwd=cwd,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    env=env,
-                    text=True,
-                    bufsize=1
-                )
-                
-                # Read output line by line
-                for line in process.stdout:
-                    line_str = line.rstrip()
-                    stdout_lines.append(line_str)
-                    if output_callback:
-                        try:
-                            output_callback(line_str)
-                        except Exception as e:
-                            logger.warning(f"Output callback error: {e}")
-                
-                # Read stderr
-                stderr_output = process.stderr.read()
-                if stderr_output:
-                    for line in stderr_output.splitlines():
-                        stderr_lines.append(line)
-                
-                # Wait for process to complete
-                process.wait(timeout=timeout)
-                return process.returncode
-            
-            # Monitor process output with timeout
-            try:
-                exit_code = await asyncio.wait_for(
-                    loop.run_in_executor(None, run_subprocess_streaming),
-                    timeout=timeout + 5
-                )
-                
-            except asyncio.TimeoutError:
-                # Timeout occurred
-                logger.error(f"Command timed out after {timeout}s: {command}")
-                duration = time.time() - start_time
-                raise CommandExecutionError(
-                    f"Command timed out after {timeout} seconds: {command}"
-                )
-            except subprocess.TimeoutExpired:
-                # Subprocess timeout
-                logger.error(f"Command timed out after {timeout}s: {command}")
-                duration = time.time() - start_time
-                raise CommandExecutionError(
-                    f"Command timed out after {timeout} seconds: {command}"
-                )
-            
-            duration = time.time() - start_time
-            
-            # Combine output lines
-            stdout = '\n'.join(stdout_lines)
-            stderr = '\n'.join(stderr_lines)
-            
-            # Determine success based on exit code
-            success = exit_code == 0
-            
-            # Log result
-            if success:
-                logger.info(
-                    f"Command completed successfully in {duration:.2f}s: {command}"
-                )
-            else:
-                logger.error(
-                    f"Command failed with exit code {exit_code} "
-                    f"after {duration:.2f}s: {command}"
-                )
-                logger.error(f"stderr: {stderr[:500]}")  # Log first 500 chars of stderr
-            
-            return CommandResult(
-                success=success,
-                exit_code=exit_code,
-                stdout=stdout,
-                stderr=stderr,
-                duration=duration
-            )
-            
-        except CommandExecutionError:
-            # Re-raise our custom errors
-            raise
+            output_callback(line.decode('utf-8', errors='replace').rstrip())
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(f"Unexpected error executing command: {str(e)}")
-            raise CommandExecutionError(
-                f"Failed to execute command: {str(e)}"
-            )
+            logger.warning("Output callback error: %s", e)
     
     async def _monitor_process(
         self,
@@ -885,40 +1330,23 @@ class CommandExecutor:
         Raises:
             asyncio.TimeoutError: If timeout is exceeded
         """
-        import time
-        start_time = time.time()
+        # Each read waits on the pipe itself until data, EOF or the deadline,
+        # so an idle child costs no wakeups
+        deadline = asyncio.get_running_loop().time() + timeout
         
         while True:
-            # Check timeout
-            elapsed = time.time() - start_time
-            if elapsed > timeout:
-                raise asyncio.TimeoutError(f"Process monitoring timed out after {timeout}s")
-            
-            # Check if process is still running
-            if process.returncode is not None:
-                break
-            
-            # Read available output
             try:
-                line = await asyncio.wait_for(
-                    process.stdout.readline(),
-                    timeout=1.0
-                )
-                
-                if line:
-                    line_str = line.decode('utf-8', errors='replace').rstrip()
-                    logger.debug(f"Process output: {line_str}")
-                    yield line_str
-                else:
-                    # No more output
-                    break
-                    
+                line = await self._run_with_deadline(process.stdout.readline(), deadline)
             except asyncio.TimeoutError:
-                # No output available, continue monitoring
-                continue
+                raise asyncio.TimeoutError(f"Process monitoring timed out after {timeout}s")
             except Exception as e:
-                logger.warning(f"Error reading process output: {e}")
+                logger.warning("Error reading process output: %s", e)
+                break
+            
+            if not line:
+                # No more output
                 break
             
-            # Small delay to prevent busy waiting
-            await asyncio.sleep(0.1)
+            line_str = line.decode('utf-8', errors='replace').rstrip()
+            logger.debug("Process output: %s", line_str)
+            yield line_str
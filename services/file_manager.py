@@ -1,151 +1,265 @@
 """File Management Service for Editor"""
+import logging
 import os
 import shutil
-from typing import Optional, Dict, Any
+import stat
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any
 from pathlib import Path
 
+from utils.fileio import write_bytes
+
+logger = logging.getLogger(__name__)
+
+# Files whose decoded contents read_file keeps in memory
+_READ_CACHE_SIZE = 256
+
+
 class FileManager:
-    def __init__(self, projects_dir: str = "projects"):
+    def __init__(
+        self,
+        projects_dir: str = "projects",
+        directory_lookup: Optional[Callable[[str], Optional[str]]] = None
+    ):
+        """
+        Initialize FileManager
+        
+        Args:
+            projects_dir: Directory holding projects not known to directory_lookup
+            directory_lookup: Optional callable returning a project's actual
+                directory (e.g. Project.directory), or None if unknown
+        """
         self.projects_dir = projects_dir
+        self.directory_lookup = directory_lookup
+        # full path -> (mtime_ns, size, content), least recently read first
+        self._read_cache: "OrderedDict[str, tuple]" = OrderedDict()
     
     def get_project_path(self, project_id: str) -> str:
         """Get full path to project directory"""
+        if self.directory_lookup is not None:
+            directory = self.directory_lookup(project_id)
+            if directory:
+                return directory
         return os.path.join(self.projects_dir, project_id)
     
+    def _project_root(self, project_id: str) -> str:
+        """Get the canonical (symlink-free) project directory"""
+        return os.path.realpath(self.get_project_path(project_id))
+    
+    def _resolve(self, project_id: str, file_path: str) -> Optional[str]:
+        """
+        Resolve a project-relative path, refusing paths that escape the project
+        
+        The whole path is canonicalized, so a symlink inside the project (such
+        as a node_modules linked from the shared pool) can't lead outside it.
+        
+        Returns:
+            Absolute path inside the project, or None if file_path leaves it
+        """
+        root = self._project_root(project_id)
+        full_path = os.path.realpath(os.path.join(root, file_path))
+        if os.path.commonpath([root, full_path]) != root:
+            logger.warning("Rejected path outside project %s: %s", project_id, file_path)
+            return None
+        return full_path
+    
     def read_file(self, project_id: str, file_path: str) -> Optional[str]:
         """Read file content"""
-        full_path = os.path.join(self.get_project_path(project_id), file_path)
+        full_path = self._resolve(project_id, file_path)
+        if full_path is None:
+            return None
         
-        if not os.path.exists(full_path) or not os.path.isfile(full_path):
+        try:
+            st = os.stat(full_path)
+        except OSError:
             return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        
+        # Reuse the last read while the file's mtime and size are unchanged
+        cached = self._read_cache.get(full_path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            self._read_cache.move_to_end(full_path)
+            return cached[2]
         
         try:
             with open(full_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                content = f.read()
         except Exception as e:
-            print(f"Error reading file: {e}")
+            logger.error("Error reading file: %s", e)
             return None
+        
+        self._read_cache[full_path] = (st.st_mtime_ns, st.st_size, content)
+        self._read_cache.move_to_end(full_path)
+        if len(self._read_cache) > _READ_CACHE_SIZE:
+            self._read_cache.popitem(last=False)
+        return content
+    
+    def _forget_cached(self, full_path: str) -> None:
+        """Drop cached reads of a file, or of everything under a directory"""
+        self._read_cache.pop(full_path, None)
+        prefix = os.path.join(full_path, '')
+        for path in [path for path in self._read_cache if path.startswith(prefix)]:
+            del self._read_cache[path]
     
     def write_file(self, project_id: str, file_path: str, content: str) -> bool:
         """Write content to file"""
-        full_path = os.path.join(self.get_project_path(project_id), file_path)
+        full_path = self._resolve(project_id, file_path)
+        if full_path is None:
+            return False
         
         try:
             # Create parent directories if they don't exist
             os.makedirs(os.path.dirname(full_path), exist_ok=True)
             
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_bytes(full_path, content.encode('utf-8'))
+            self._forget_cached(full_path)
             
             # Touch a watch file to trigger Metro bundler reload
             self._trigger_reload(project_id)
             
             return True
         except Exception as e:
-            print(f"Error writing file: {e}")
+            logger.error("Error writing file: %s", e)
+            return False
+    
+    def write_files(self, project_id: str, files: Dict[str, str]) -> bool:
+        """Write several files, then trigger a single reload"""
+        # Validate every path before writing anything
+        full_paths = [self._resolve(project_id, file_path) for file_path in files]
+        if None in full_paths:
+            return False
+        
+        try:
+            # Create each distinct parent directory once, not once per file
+            for directory in sorted({os.path.dirname(path) for path in full_paths}):
+                os.makedirs(directory, exist_ok=True)
+            for full_path, content in zip(full_paths, files.values()):
+                write_bytes(full_path, content.encode('utf-8'))
+        except Exception as e:
+            logger.error("Error writing files: %s", e)
             return False
+        finally:
+            for full_path in full_paths:
+                self._forget_cached(full_path)
+        
+        self._trigger_reload(project_id)
+        return True
     
     def _trigger_reload(self, project_id: str):
         """Trigger Metro bundler reload by touching a file"""
+        app_json = os.path.join(self._project_root(project_id), 'app.json')
         try:
-            import time
-            project_path = self.get_project_path(project_id)
-            # Touch app.json to trigger reload
-            app_json = os.path.join(project_path, 'app.json')
-            if os.path.exists(app_json):
-                # Update modification time
-                os.utime(app_json, None)
+            # Touch app.json to trigger reload; projects without one are skipped
+            os.utime(app_json, None)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            print(f"Error triggering reload: {e}")
+            logger.error("Error triggering reload: %s", e)
     
     def create_file(self, project_id: str, file_path: str, content: str = "") -> bool:
         """Create a new file"""
-        result = self.write_file(project_id, file_path, content)
-        if result:
-            self._trigger_reload(project_id)
-        return result
+        # write_file already triggers the reload
+        return self.write_file(project_id, file_path, content)
     
     def create_folder(self, project_id: str, folder_path: str) -> bool:
         """Create a new folder"""
-        full_path = os.path.join(self.get_project_path(project_id), folder_path)
+        full_path = self._resolve(project_id, folder_path)
+        if full_path is None:
+            return False
         
         try:
             os.makedirs(full_path, exist_ok=True)
             return True
         except Exception as e:
-            print(f"Error creating folder: {e}")
+            logger.error("Error creating folder: %s", e)
             return False
     
     def delete_file(self, project_id: str, file_path: str) -> bool:
         """Delete a file"""
-        full_path = os.path.join(self.get_project_path(project_id), file_path)
-        
-        if not os.path.exists(full_path):
+        full_path = self._resolve(project_id, file_path)
+        if full_path is None or full_path == self._project_root(project_id):
+            # Never delete the project directory itself
             return False
         
         try:
-            if os.path.isfile(full_path):
+            try:
                 os.remove(full_path)
-            elif os.path.isdir(full_path):
+            except FileNotFoundError:
+                return False
+            except OSError:
+                # Directories can't be unlinked (IsADirectoryError on Linux,
+                # PermissionError on Windows and macOS)
+                if not os.path.isdir(full_path):
+                    raise
                 shutil.rmtree(full_path)
+            self._forget_cached(full_path)
             
             # Trigger reload
             self._trigger_reload(project_id)
             
             return True
         except Exception as e:
-            print(f"Error deleting file: {e}")
+            logger.error("Error deleting file: %s", e)
             return False
     
     def rename_file(self, project_id: str, old_path: str, new_name: str) -> bool:
         """Rename a file or folder"""
-        old_full_path = os.path.join(self.get_project_path(project_id), old_path)
-        
-        if not os.path.exists(old_full_path):
+        old_full_path = self._resolve(project_id, old_path)
+        if old_full_path is None or old_full_path == self._project_root(project_id):
             return False
         
-        # Get directory and create new path
-        directory = os.path.dirname(old_full_path)
-        new_full_path = os.path.join(directory, new_name)
+        # Get directory and create new path (new_name must not leave the project)
+        new_full_path = self._resolve(project_id, os.path.join(os.path.dirname(old_path), new_name))
+        if new_full_path is None:
+            return False
         
         try:
-            os.rename(old_full_path, new_full_path)
+            try:
+                os.replace(old_full_path, new_full_path)
+            except FileNotFoundError:
+                return False
+            self._forget_cached(old_full_path)
+            self._forget_cached(new_full_path)
             
             # Trigger reload
             self._trigger_reload(project_id)
             
             return True
         except Exception as e:
-            print(f"Error renaming file: {e}")
+            logger.error("Error renaming file: %s", e)
             return False
     
     def list_files(self, project_id: str, directory: str = "") -> Dict[str, Any]:
         """List files in a directory"""
-        full_path = os.path.join(self.get_project_path(project_id), directory)
+        full_path = self._resolve(project_id, directory)
         
-        if not os.path.exists(full_path) or not os.path.isdir(full_path):
+        if full_path is None or not os.path.exists(full_path) or not os.path.isdir(full_path):
             return {"files": [], "folders": []}
         
         files = []
         folders = []
         
         try:
-            for item in os.listdir(full_path):
-                item_path = os.path.join(full_path, item)
-                
-                if os.path.isfile(item_path):
-                    files.append({
-                        "name": item,
-                        "path": os.path.join(directory, item) if directory else item,
-                        "size": os.path.getsize(item_path)
-                    })
-                elif os.path.isdir(item_path):
-                    folders.append({
-                        "name": item,
-                        "path": os.path.join(directory, item) if directory else item
-                    })
+            # DirEntry carries the file type from the directory listing, so
+            # only files need a stat (for their size)
+            with os.scandir(full_path) as entries:
+                for entry in entries:
+                    item = entry.name
+                    
+                    if entry.is_file():
+                        files.append({
+                            "name": item,
+                            "path": os.path.join(directory, item) if directory else item,
+                            "size": entry.stat().st_size
+                        })
+                    elif entry.is_dir():
+                        folders.append({
+                            "name": item,
+                            "path": os.path.join(directory, item) if directory else item
+                        })
             
             return {"files": files, "folders": folders}
         except Exception as e:
-            print(f"Error listing files: {e}")
+            logger.error("Error listing files: %s", e)
             return {"files": [], "folders": []}
@@ -1,10 +1,37 @@
 """AI Image Generation Service with Gemini and OpenAI Fallback"""
+import asyncio
+import logging
 import os
 import base64
-import requests
 from typing import Optional, Tuple
 from io import BytesIO
 
+import httpx
+
+from utils.fileio import write_bytes
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client for downloading generated images, so repeated downloads
+# from the image CDN reuse pooled TLS connections
+_download_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_download_client() -> httpx.AsyncClient:
+    """Get the shared image download client, creating it on first use"""
+    global _download_client
+    if _download_client is None:
+        _download_client = httpx.AsyncClient(timeout=30)
+    return _download_client
+
+
+async def close_download_client() -> None:
+    """Close the shared image download client (call on application shutdown)"""
+    global _download_client
+    client, _download_client = _download_client, None
+    if client is not None:
+        await client.aclose()
+
 class AIImageGenerator:
     def __init__(self, gemini_api_key: str = None, openai_api_key: str = None):
         """
@@ -33,27 +60,29 @@ class AIImageGenerator:
                 import google.generativeai as genai
                 genai.configure(api_key=gemini_api_key)
                 self.genai = genai
+                # Built once; every image request reuses the same model
+                self.gemini_image_model = genai.GenerativeModel('gemini-2.5-flash-image')
                 self.gemini_available = True
-                print("✓ Gemini AI configured for image generation (gemini-2.5-flash-image)")
+                logger.info("✓ Gemini AI configured for image generation (gemini-2.5-flash-image)")
             except ImportError:
-                print("⚠ google-generativeai not installed. Install: pip install google-generativeai")
+                logger.warning("⚠ google-generativeai not installed. Install: pip install google-generativeai")
             except Exception as e:
-                print(f"⚠ Gemini configuration failed: {e}")
+                logger.warning("⚠ Gemini configuration failed: %s", e)
         
         # Check OpenAI availability
         self.openai_available = False
         if openai_api_key:
             try:
-                from openai import OpenAI
-                self.openai_client = OpenAI(api_key=openai_api_key)
+                from services.code_generator import get_shared_client
+                self.openai_client = get_shared_client(openai_api_key, 60)
                 self.openai_available = True
-                print("✓ OpenAI configured for image generation (fallback)")
+                logger.info("✓ OpenAI configured for image generation (fallback)")
             except ImportError:
-                print("⚠ openai package not installed")
+                logger.warning("⚠ openai package not installed")
             except Exception as e:
-                print(f"⚠ OpenAI configuration failed: {e}")
+                logger.warning("⚠ OpenAI configuration failed: %s", e)
     
-    def generate_image(self, prompt: str) -> Tuple[Optional[bytes], str]:
+    async def generate_image(self, prompt: str) -> Tuple[Optional[bytes], str]:
         """
         Generate an image using AI with fallback support
         
@@ -70,27 +99,28 @@ class AIImageGenerator:
         # Try Gemini first (if available)
         if self.gemini_available:
             try:
-                print(f"🎨 Attempting image generation with Gemini...")
-                result = self._generate_with_gemini(prompt)
+                logger.info("🎨 Attempting image generation with Gemini...")
+                # The Gemini SDK call is blocking; keep it off the event loop
+                result = await asyncio.to_thread(self._generate_with_gemini, prompt)
                 if result:
                     return result, "gemini"
                 errors.append("Gemini: Not yet implemented")
             except Exception as e:
                 error_msg = f"Gemini: {str(e)}"
-                print(f"⚠ {error_msg}")
+                logger.warning("⚠ %s", error_msg)
                 errors.append(error_msg)
         
         # Fallback to OpenAI DALL-E
         if self.openai_available:
             try:
-                print(f"🎨 Falling back to OpenAI DALL-E...")
-                result = self._generate_with_openai(prompt)
+                logger.info("🎨 Falling back to OpenAI DALL-E...")
+                result = await self._generate_with_openai(prompt)
                 if result:
                     return result, "openai"
                 errors.append("OpenAI: No result returned")
             except Exception as e:
                 error_msg = f"OpenAI: {str(e)}"
-                print(f"⚠ {error_msg}")
+                logger.warning("⚠ %s", error_msg)
                 errors.append(error_msg)
         
         # No providers available or all failed
@@ -107,15 +137,10 @@ class AIImageGenerator:
         Uses the new native image generation capability
         """
         try:
-            import google.generativeai as genai
-            
-            # Use the new Gemini 2.5 Flash Image model
-            model = genai.GenerativeModel('gemini-2.5-flash-image')
-            
-            print(f"🎨 Generating image with Gemini 2.5 Flash Image...")
+            logger.info("🎨 Generating image with Gemini 2.5 Flash Image...")
             
             # Generate content with the prompt
-            response = model.generate_content(prompt)
+            response = self.gemini_image_model.generate_content(prompt)
             
             # Extract image data from response
             for part in response.parts:
@@ -124,28 +149,25 @@ class AIImageGenerator:
                     image_data = part.inline_data.data
                     
                     # Decode base64 to bytes
-                    import base64
                     image_bytes = base64.b64decode(image_data)
                     
-                    print(f"✓ Image generated successfully with Gemini 2.5 Flash Image")
+                    logger.info("✓ Image generated successfully with Gemini 2.5 Flash Image")
                     return image_bytes
                 elif hasattr(part, 'text') and part.text:
-                    print(f"📝 Gemini response text: {part.text}")
+                    logger.debug("📝 Gemini response text: %s", part.text)
             
-            print("⚠ No image data found in Gemini response")
+            logger.warning("⚠ No image data found in Gemini response")
             return None
             
         except Exception as e:
-            print(f"✗ Gemini image generation failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("✗ Gemini image generation failed: %s", e)
             raise
     
-    def _generate_with_openai(self, prompt: str) -> Optional[bytes]:
+    async def _generate_with_openai(self, prompt: str) -> Optional[bytes]:
         """Generate image using OpenAI DALL-E"""
         try:
             # Generate image with DALL-E 3
-            response = self.openai_client.images.generate(
+            response = await self.openai_client.images.generate(
                 model="dall-e-3",
                 prompt=prompt,
                 size="1024x1024",
@@ -156,15 +178,18 @@ class AIImageGenerator:
             # Get image URL
             image_url = response.data[0].url
             
-            # Download image
-            image_response = requests.get(image_url, timeout=30)
-            image_response.raise_for_status()
+            # Download image over the shared connection pool
+            image_data = bytearray()
+            async with _get_download_client().stream("GET", image_url) as image_response:
+                image_response.raise_for_status()
+                async for chunk in image_response.aiter_bytes(65536):
+                    image_data += chunk
             
-            print(f"✓ Image generated successfully with DALL-E 3")
-            return image_response.content
+            logger.info("✓ Image generated successfully with DALL-E 3")
+            return bytes(image_data)
             
         except Exception as e:
-            print(f"✗ DALL-E generation failed: {e}")
+            logger.error("✗ DALL-E generation failed: %s", e)
             raise
     
     def save_image_to_project(self, project_path: str, image_data: bytes, filename: str) -> str:
@@ -178,7 +203,6 @@ class AIImageGenerator:
         
         file_path = os.path.join(assets_path, filename)
         
-        with open(file_path, 'wb') as f:
-            f.write(image_data)
+        write_bytes(file_path, image_data)
         
         return file_path
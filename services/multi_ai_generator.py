@@ -3,13 +3,23 @@ Multi-AI Code Generator
 Automatically falls back to Gemini if OpenAI quota is exceeded
 """
 import asyncio
+import copy
 import logging
-from typing import Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Optional
 import google.generativeai as genai
-from openai import AsyncOpenAI, OpenAIError
+from openai import OpenAIError, RateLimitError
+
+from exceptions import AIGenerationError
+from services.code_generator import get_shared_client
 
 logger = logging.getLogger(__name__)
 
+# Characters stripped from generated app names
+_APP_NAME_RE = re.compile(r'[^a-z0-9]')
+
 
 class ResponsesWrapper:
     """Wrapper to make MultiAIGenerator compatible with OpenAI client interface"""
@@ -17,9 +27,9 @@ class ResponsesWrapper:
     def __init__(self, generator):
         self.generator = generator
     
-    async def create(self, model: str, input: str):
+    async def create(self, model: str, input: str, instructions: Optional[str] = None):
         """Create a response using multi-AI generator"""
-        text = await self.generator.generate(input)
+        text = await self.generator.generate(input, instructions=instructions)
         
         # Return object that mimics OpenAI response
         class Response:
@@ -27,6 +37,28 @@ class ResponsesWrapper:
                 self.output_text = text
         
         return Response(text)
+    
+    def stream(self, model: str, input: str, instructions: Optional[str] = None):
+        """Stream a response using multi-AI generator"""
+        return ResponseStream(self.generator.generate_stream(input, instructions=instructions))
+
+
+class ResponseStream:
+    """Async context manager mimicking the OpenAI Responses stream interface"""
+    
+    def __init__(self, events: AsyncIterator[Any]):
+        self._events = events
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        # Closing the generator also closes the underlying OpenAI stream
+        await self._events.aclose()
+        return False
+    
+    def __aiter__(self):
+        return self._events
 
 
 class MultiAIGenerator:
@@ -44,13 +76,17 @@ class MultiAIGenerator:
             model: OpenAI model to use
             timeout: Timeout for API calls
         """
-        self.openai_client = AsyncOpenAI(api_key=openai_key, timeout=timeout)
+        self.openai_client = get_shared_client(openai_key, timeout)
         self.openai_model = model
         self.timeout = timeout
         
         # Create responses wrapper for compatibility
         self.responses = ResponsesWrapper(self)
         
+        # Gemini's SDK is synchronous; its calls get their own threads so a
+        # busy default executor can't delay a fallback generation
+        self._gemini_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+        
         # Initialize Gemini if key provided
         self.gemini_available = False
         if gemini_key:
@@ -62,47 +98,148 @@ class MultiAIGenerator:
             except Exception as e:
                 logger.warning(f"Failed to initialize Gemini: {e}")
     
-    async def generate(self, prompt: str) -> str:
+    def close(self) -> None:
+        """Shut down the Gemini worker threads (call on application shutdown)"""
+        self._gemini_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def with_options(
+        self,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ) -> "MultiAIGenerator":
+        """
+        Return a copy of this generator with a different request timeout or retry count
+        
+        Mirrors AsyncOpenAI.with_options so callers can set per-call options
+        regardless of which client they hold.
+        
+        Args:
+            timeout: Timeout in seconds for API calls
+            max_retries: SDK-level retries for OpenAI requests
+            
+        Returns:
+            MultiAIGenerator sharing this instance's clients and executor
+        """
+        generator = copy.copy(self)
+        if timeout is not None:
+            generator.timeout = timeout
+        if max_retries is not None:
+            generator.openai_client = self.openai_client.with_options(max_retries=max_retries)
+        generator.responses = ResponsesWrapper(generator)
+        return generator
+    
+    async def generate(self, prompt: str, instructions: Optional[str] = None) -> str:
         """
         Generate code using OpenAI, fallback to Gemini if quota exceeded
         
         Args:
             prompt: User prompt
+            instructions: Optional system instructions sent alongside the prompt
             
         Returns:
             Generated code
         """
+        request_kwargs = {"model": self.openai_model, "input": prompt}
+        if instructions:
+            request_kwargs["instructions"] = instructions
+        
         # Try OpenAI first
         try:
             logger.info("Attempting code generation with OpenAI")
-            response = await asyncio.wait_for(
-                self.openai_client.responses.create(
-                    model=self.openai_model,
-                    input=prompt
-                ),
-                timeout=self.timeout
-            )
+            async with asyncio.timeout(self.timeout):
+                response = await self.openai_client.responses.create(**request_kwargs)
             logger.info("✅ OpenAI generation successful")
             return response.output_text
             
         except OpenAIError as e:
-            error_str = str(e).lower()
-            
-            # Check if it's a quota error
-            if 'quota' in error_str or '429' in error_str or 'insufficient_quota' in error_str:
-                logger.warning("⚠️  OpenAI quota exceeded, falling back to Gemini")
-                
-                if self.gemini_available:
-                    return await self._generate_with_gemini(prompt)
-                else:
-                    logger.error("❌ Gemini not available, cannot fallback")
-                    raise Exception(
-                        "OpenAI quota exceeded and Gemini fallback not configured. "
-                        "Please add GEMINI_API_KEY to .env file or add credits to OpenAI account."
-                    )
-            else:
+            if not self._is_quota_error(e):
                 # Other OpenAI error, re-raise
                 raise
+            return await self._fall_back_to_gemini(prompt, instructions, e)
+    
+    async def generate_stream(self, prompt: str, instructions: Optional[str] = None) -> AsyncIterator[Any]:
+        """
+        Stream code generation events from OpenAI, fallback to Gemini if quota exceeded
+        
+        OpenAI events are passed through as they arrive. Gemini isn't
+        streamed, so a fallback yields the whole text as a single
+        response.output_text.delta event. Once OpenAI has delivered text, a
+        later error is re-raised rather than falling back, which would
+        repeat the text already yielded.
+        
+        Args:
+            prompt: User prompt
+            instructions: Optional system instructions sent alongside the prompt
+            
+        Yields:
+            Responses stream events
+        """
+        request_kwargs = {"model": self.openai_model, "input": prompt}
+        if instructions:
+            request_kwargs["instructions"] = instructions
+        
+        delivered = False
+        try:
+            logger.info("Attempting streamed code generation with OpenAI")
+            async with self.openai_client.responses.stream(**request_kwargs) as stream:
+                async for event in stream:
+                    if event.type == "response.output_text.delta":
+                        delivered = True
+                    yield event
+            logger.info("✅ OpenAI generation successful")
+            return
+            
+        except OpenAIError as e:
+            if delivered or not self._is_quota_error(e):
+                raise
+            error = e
+        
+        text = await self._fall_back_to_gemini(prompt, instructions, error)
+        yield SimpleNamespace(type="response.output_text.delta", delta=text)
+    
+    @staticmethod
+    def _is_quota_error(error: OpenAIError) -> bool:
+        """Check whether an OpenAI error means the quota is exhausted"""
+        # Use the structured error fields; formatting the message could mean
+        # rendering a large JSON body
+        return (
+            isinstance(error, RateLimitError)
+            or getattr(error, 'status_code', None) == 429
+            or getattr(error, 'code', None) == 'insufficient_quota'
+        )
+    
+    async def _fall_back_to_gemini(
+        self,
+        prompt: str,
+        instructions: Optional[str],
+        error: OpenAIError
+    ) -> str:
+        """
+        Generate with Gemini after OpenAI ran out of quota
+        
+        Args:
+            prompt: User prompt
+            instructions: Optional system instructions, prepended to the prompt
+            error: The OpenAI quota error
+            
+        Returns:
+            Generated code
+            
+        Raises:
+            AIGenerationError: If Gemini isn't configured or fails
+        """
+        logger.warning("⚠️  OpenAI quota exceeded, falling back to Gemini")
+        
+        if not self.gemini_available:
+            logger.error("❌ Gemini not available, cannot fallback")
+            raise AIGenerationError(
+                "OpenAI quota exceeded and Gemini fallback not configured. "
+                "Please add GEMINI_API_KEY to .env file or add credits to OpenAI account."
+            ) from error
+        
+        if instructions:
+            prompt = "".join((instructions, "\n\n", prompt))
+        return await self._generate_with_gemini(prompt)
     
     async def _generate_with_gemini(self, prompt: str) -> str:
         """
@@ -117,10 +254,10 @@ class MultiAIGenerator:
         try:
             logger.info("🔄 Generating with Gemini...")
             
-            # Run Gemini in thread pool (it's synchronous)
-            loop = asyncio.get_event_loop()
+            # Run Gemini in its own thread pool (it's synchronous)
+            loop = asyncio.get_running_loop()
             response = await loop.run_in_executor(
-                None,
+                self._gemini_executor,
                 self.gemini_model.generate_content,
                 prompt
             )
@@ -130,7 +267,7 @@ class MultiAIGenerator:
             
         except Exception as e:
             logger.error(f"❌ Gemini generation failed: {e}")
-            raise Exception(f"Both OpenAI and Gemini failed. Gemini error: {str(e)}")
+            raise AIGenerationError(f"Both OpenAI and Gemini failed. Gemini error: {str(e)}") from e
     
     async def generate_app_name(self, prompt: str) -> str:
         """
@@ -159,8 +296,7 @@ Respond with ONLY the app name, nothing else."""
             app_name = response.strip().lower()
             
             # Clean the name
-            import re
-            app_name = re.sub(r'[^a-z0-9]', '', app_name)
+            app_name = _APP_NAME_RE.sub('', app_name)
             
             if not app_name or len(app_name) < 2:
                 app_name = "myapp"
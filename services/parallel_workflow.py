@@ -78,29 +78,25 @@ class ParallelWorkflow:
             # 1. Create tunnel
             # 2. Generate screens (which analyzes image needs)
             # 3. (Images will be generated after screens are analyzed)
-            tunnel_task = self._create_tunnel(port, project_id)
-            screens_task = self._generate_screens(prompt, project_dir, generate_images)
-            
-            # Wait for tunnel and screens
-            tunnel_url, screen_definitions = await asyncio.gather(
-                tunnel_task,
-                screens_task
-            )
+            # A TaskGroup cancels the sibling as soon as either task fails
+            async with asyncio.TaskGroup() as tg:
+                tunnel_task = tg.create_task(self._create_tunnel(port, project_id))
+                screens_task = tg.create_task(
+                    self._generate_screens(prompt, project_dir, generate_images)
+                )
+            tunnel_url = tunnel_task.result()
+            screen_definitions = screens_task.result()
             
             # Now generate images in parallel with writing screens
-            write_task = asyncio.create_task(
-                self._write_screens(screen_definitions, project_dir)
-            )
-            
-            images_task = asyncio.create_task(
-                self._generate_images(screen_definitions, project_dir, generate_images)
-            )
-            
-            # Wait for both to complete
-            created_files, generated_images = await asyncio.gather(
-                write_task,
-                images_task
-            )
+            async with asyncio.TaskGroup() as tg:
+                write_task = tg.create_task(
+                    self._write_screens(screen_definitions, project_dir)
+                )
+                images_task = tg.create_task(
+                    self._generate_images(screen_definitions, project_dir, generate_images)
+                )
+            created_files = write_task.result()
+            generated_images = images_task.result()
             
             logger.info(
                 f"Parallel workflow completed: "
@@ -117,7 +113,10 @@ class ParallelWorkflow:
             )
             
         except Exception as e:
-            logger.error(f"Parallel workflow failed: {e}", exc_info=True)
+            # Report the task failure that triggered the TaskGroup, not the group wrapper
+            if isinstance(e, ExceptionGroup):
+                e = e.exceptions[0]
+            logger.error(f"Parallel workflow failed: {e}", exc_info=e)
             return WorkflowResult(
                 preview_url="",
                 screens_created=[],
@@ -184,7 +183,7 @@ class ParallelWorkflow:
             List of created file paths
         """
         logger.info("Writing screens to project")
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         created_files = await loop.run_in_executor(
             None,
             self.screen_generator.write_screens_to_project,
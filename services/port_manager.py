@@ -2,8 +2,9 @@
 Port Manager Service
 Handles port allocation for concurrent project instances
 """
+import heapq
 import logging
-from typing import Set, Optional
+from typing import List, Set, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,9 @@ class PortManager:
         self.start_port = start_port
         self.max_ports = max_ports
         self.allocated_ports: Set[int] = set()
+        # Min-heap of free ports so the lowest free port is handed out first.
+        # Only touched from the event loop, so no locking is needed.
+        self._free_ports: List[int] = list(range(start_port, start_port + max_ports))
         logger.info(
             f"PortManager initialized: start_port={start_port}, "
             f"max_ports={max_ports}"
@@ -42,27 +46,20 @@ class PortManager:
         Raises:
             PortAllocationError: If no ports available
         """
-        # Check if we've reached maximum concurrent projects
-        if len(self.allocated_ports) >= self.max_ports:
+        try:
+            port = heapq.heappop(self._free_ports)
+        except IndexError:
             logger.error(
                 f"Maximum concurrent projects reached: {self.max_ports}"
             )
             raise PortAllocationError(
                 f"Maximum concurrent projects limit reached ({self.max_ports}). "
                 "Please try again later."
-            )
-        
-        # Find first available port
-        for offset in range(self.max_ports):
-            port = self.start_port + offset
-            if port not in self.allocated_ports:
-                self.allocated_ports.add(port)
-                logger.info(f"Allocated port {port} (total allocated: {len(self.allocated_ports)})")
-                return port
+            ) from None
+        self.allocated_ports.add(port)
         
-        # This should never happen if max_ports check works correctly
-        logger.error("Failed to find available port despite capacity check")
-        raise PortAllocationError("Failed to allocate port")
+        logger.info(f"Allocated port {port} (total allocated: {len(self.allocated_ports)})")
+        return port
     
     def release_port(self, port: int) -> None:
         """
@@ -73,6 +70,7 @@ class PortManager:
         """
         if port in self.allocated_ports:
             self.allocated_ports.remove(port)
+            heapq.heappush(self._free_ports, port)
             logger.info(f"Released port {port} (total allocated: {len(self.allocated_ports)})")
         else:
             logger.warning(f"Attempted to release unallocated port: {port}")
@@ -105,7 +103,7 @@ class PortManager:
         Returns:
             Number of available ports
         """
-        return self.max_ports - len(self.allocated_ports)
+        return len(self._free_ports)
     
     def can_allocate(self) -> bool:
         """
@@ -114,7 +112,7 @@ class PortManager:
         Returns:
             True if port allocation is possible, False otherwise
         """
-        return len(self.allocated_ports) < self.max_ports
+        return bool(self._free_ports)
     
     def reset(self) -> None:
         """
@@ -122,4 +120,5 @@ class PortManager:
         """
         count = len(self.allocated_ports)
         self.allocated_ports.clear()
+        self._free_ports = list(range(self.start_port, self.start_port + self.max_ports))
         logger.warning(f"Reset all port allocations ({count} ports released)")
@@ -9,8 +9,13 @@ from pathlib import Path
 from typing import Optional, Dict
 from datetime import datetime
 
+from services.command_executor import EXPO_READY_PATTERN
+
 logger = logging.getLogger(__name__)
 
+# Longest wait for the ready output before assuming a slow but live server
+_READY_TIMEOUT = 30
+
 
 class ProjectBuilder:
     """
@@ -76,6 +81,13 @@ class ProjectBuilder:
         """Install dependencies locally in project"""
         logger.info(f"Installing dependencies in {project_dir}")
         
+        # A node_modules linked from the shared pool is used by other projects;
+        # unlink it so npm installs into a directory this project owns
+        node_modules = Path(project_dir) / "node_modules"
+        if node_modules.is_symlink():
+            logger.info(f"Unlinking pooled node_modules in {project_dir} before install")
+            node_modules.unlink()
+        
         process = await asyncio.create_subprocess_exec(
             "npm", "install", "--legacy-peer-deps",
             cwd=project_dir,
@@ -123,15 +135,65 @@ class ProjectBuilder:
             stderr=asyncio.subprocess.PIPE
         )
         
+        # Keep both pipes drained for the life of the server so it never
+        # blocks on a full pipe; stdout also signals readiness
+        ready = asyncio.Event()
+        process.drain_tasks = (
+            asyncio.create_task(self._pipe_output(process.stdout, port, ready)),
+            asyncio.create_task(self._pipe_output(process.stderr, port))
+        )
+        
         # Wait for server to be ready
-        await asyncio.sleep(5)
+        ready_wait = asyncio.create_task(ready.wait())
+        exit_wait = asyncio.create_task(process.wait())
+        try:
+            await asyncio.wait(
+                (ready_wait, exit_wait),
+                timeout=_READY_TIMEOUT,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            ready_wait.cancel()
+            exit_wait.cancel()
         
         if process.returncode is not None:
             raise Exception("Expo server failed to start")
         
-        logger.info(f"Expo server started (PID: {process.pid})")
+        if ready.is_set():
+            logger.info(f"Expo server started (PID: {process.pid})")
+        else:
+            logger.warning(
+                f"Expo server (PID: {process.pid}) still running but not ready after {_READY_TIMEOUT}s"
+            )
         return process
     
+    async def _pipe_output(
+        self,
+        stream: asyncio.StreamReader,
+        port: int,
+        ready: Optional[asyncio.Event] = None
+    ):
+        """
+        Log server output until EOF, setting ready when Expo reports it is up
+        
+        Args:
+            stream: Process stdout or stderr
+            port: Server port, used to label log lines
+            ready: Optional event to set on the first ready line
+        """
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # Overlong line; the reader already discarded it
+                continue
+            if not line:
+                return
+            text = line.decode(errors="replace").rstrip()
+            logger.debug("[expo:%s] %s", port, text)
+            if ready is not None and not ready.is_set() and EXPO_READY_PATTERN.search(text):
+                ready.set()
+    
     async def stop_build(self, project_id: str):
         """
         Stop a running build
@@ -7,10 +7,14 @@ import logging
 import os
 from typing import List, Dict, Optional
 from dataclasses import dataclass, field
-from openai import AsyncOpenAI
+
+from services.code_generator import get_shared_client
 
 logger = logging.getLogger(__name__)
 
+# Default timeout for screen-generation API calls (matches the OpenAI SDK default)
+_OPENAI_TIMEOUT = 600
+
 
 @dataclass
 class ImageRequirement:
@@ -43,7 +47,7 @@ class ScreenGenerator:
             model: OpenAI model to use
             gemini_api_key: Gemini API key for image generation (optional)
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = get_shared_client(api_key, _OPENAI_TIMEOUT)
         self.model = model
         
         # Initialize image generator
@@ -580,11 +584,7 @@ const styles = StyleSheet.create({{
         try:
             logger.info(f"Generating image: {image_req.filename}")
             
-            # Run image generation in executor (it's blocking)
-            loop = asyncio.get_event_loop()
-            image_data, provider = await loop.run_in_executor(
-                None,
-                self.image_generator.generate_image,
+            image_data, provider = await self.image_generator.generate_image(
                 image_req.description
             )
             
@@ -0,0 +1,97 @@
+"""
+Semantic Cache Service
+Reuses results for prompts whose embeddings are nearly identical
+"""
+import logging
+import math
+import operator
+import time
+from dataclasses import dataclass
+from typing import Any, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    """A cached value with the unit-length embedding it was stored under"""
+    namespace: Hashable
+    vector: List[float]
+    value: Any
+    expires_at: float
+
+
+def _normalize(embedding: Sequence[float]) -> List[float]:
+    """Scale an embedding to unit length so a dot product is its cosine"""
+    norm = math.sqrt(sum(x * x for x in embedding))
+    if norm == 0:
+        return list(embedding)
+    return [x / norm for x in embedding]
+
+
+class SemanticCache:
+    """
+    In-memory cache looked up by embedding similarity instead of exact key
+
+    Entries are scanned linearly; with a few hundred small (256-d) vectors a
+    lookup takes well under a millisecond, far below the generation it saves.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 24 * 3600, threshold: float = 0.92):
+        """
+        Initialize SemanticCache
+
+        Args:
+            max_entries: Maximum cached entries; the oldest is evicted first
+            ttl: Seconds an entry stays valid
+            threshold: Minimum cosine similarity counted as a hit
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: List[_CacheEntry] = []
+
+    def search(self, namespace: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        """
+        Find the most similar live entry in a namespace
+
+        Args:
+            namespace: Partition the entry was stored under
+            embedding: Embedding of the new prompt
+
+        Returns:
+            Cached value of the best match at or above the threshold, or None
+        """
+        now = time.monotonic()
+        self._entries = [entry for entry in self._entries if entry.expires_at > now]
+
+        query = _normalize(embedding)
+        best_value, best_score = None, self.threshold
+        for entry in self._entries:
+            if entry.namespace != namespace or len(entry.vector) != len(query):
+                continue
+            score = sum(map(operator.mul, entry.vector, query))
+            if score >= best_score:
+                best_value, best_score = entry.value, score
+
+        if best_value is not None:
+            logger.info("Semantic cache hit (similarity %.3f)", best_score)
+        return best_value
+
+    def insert(self, namespace: Hashable, embedding: Sequence[float], value: Any) -> None:
+        """
+        Store a value under an embedding
+
+        Args:
+            namespace: Partition to store the entry in
+            embedding: Embedding of the prompt that produced the value
+            value: Value to return for similar prompts
+        """
+        self._entries.append(_CacheEntry(
+            namespace=namespace,
+            vector=_normalize(embedding),
+            value=value,
+            expires_at=time.monotonic() + self.ttl
+        ))
+        if len(self._entries) > self.max_entries:
+            del self._entries[:-self.max_entries]
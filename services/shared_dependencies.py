@@ -7,12 +7,29 @@ import logging
 import asyncio
 import json
 import hashlib
+import shutil
+import time
 from pathlib import Path
 from typing import Optional, Dict, Set
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: pool installs are only deduplicated within a process
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+# Longest a background pool install may run before it is killed
+_POOL_INSTALL_TIMEOUT = 600
+
+# Unreferenced pool entries kept on disk; least recently linked are evicted
+# first. Entries still linked from a project are never evicted.
+_POOL_MAX_ENTRIES = 32
+
+# package.json fields that decide what npm installs
+_POOL_KEY_FIELDS = ("dependencies", "devDependencies")
+
 
 class SharedDependenciesManager:
     """
@@ -45,6 +62,12 @@ class SharedDependenciesManager:
         # Lock file for concurrent access
         self.lock_file = self.shared_dir / ".lock"
         
+        # Content-addressable node_modules pool keyed by package.json hash
+        self.pool_dir = self.shared_dir / "pool"
+        self.pool_dir.mkdir(exist_ok=True)
+        # Background pool installs in this process, keyed by package.json hash
+        self._pool_tasks: Dict[str, asyncio.Task] = {}
+        
         # Track if global modules are installed
         self.is_initialized = self.global_node_modules.exists()
         
@@ -317,6 +340,229 @@ class SharedDependenciesManager:
         
         return str(self.global_node_modules)
     
+    async def link_project_node_modules(self, project_dir: str) -> Optional[str]:
+        """
+        Symlink a pooled node_modules into a project if one is ready
+        
+        The pool is keyed by a hash of the project's dependencies (and its
+        package-lock.json, if any), so projects that differ only in name or
+        slug share one install. Only complete
+        entries are linked; on a miss the entry is installed in the background
+        and the project keeps using the global node_modules via NODE_PATH.
+        
+        Args:
+            project_dir: Project directory containing package.json
+            
+        Returns:
+            Path to the linked node_modules, or None if nothing was linked
+        """
+        project_path = Path(project_dir)
+        package_json_path = project_path / "package.json"
+        link_path = project_path / "node_modules"
+        
+        if not package_json_path.exists():
+            logger.warning(f"No package.json in {project_dir}, skipping node_modules link")
+            return None
+        
+        if link_path.is_symlink() and not link_path.exists():
+            # Points at an evicted pool entry
+            link_path.unlink()
+        elif link_path.exists():
+            return str(link_path)
+        
+        try:
+            package_data = json.loads(package_json_path.read_bytes())
+        except ValueError as e:
+            logger.warning(f"Unreadable package.json in {project_dir}, skipping node_modules link: {e}")
+            return None
+        manifest = {field: package_data.get(field) or {} for field in _POOL_KEY_FIELDS}
+        lock_path = project_path / "package-lock.json"
+        lock_bytes = lock_path.read_bytes() if lock_path.exists() else None
+        
+        key = self._pool_key(manifest, lock_bytes)
+        entry_dir = self.pool_dir / key
+        ready_marker = entry_dir / ".ready"
+        
+        if not ready_marker.exists():
+            self._schedule_pool_install(key, manifest, lock_bytes)
+            return None
+        
+        os.symlink(entry_dir / "node_modules", link_path, target_is_directory=True)
+        self._record_link(entry_dir, link_path)
+        # Record the use so eviction keeps recently linked entries
+        os.utime(ready_marker)
+        logger.info(f"Linked {link_path} -> {entry_dir / 'node_modules'}")
+        
+        return str(link_path)
+    
+    @staticmethod
+    def _pool_key(manifest: Dict[str, Dict[str, str]], lock_bytes: Optional[bytes]) -> str:
+        """
+        Hash the inputs that determine a node_modules install
+        
+        Args:
+            manifest: dependencies and devDependencies from package.json
+            lock_bytes: Raw package-lock.json contents, or None if there is none
+            
+        Returns:
+            Pool entry key
+        """
+        digest = hashlib.blake2b(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+        if lock_bytes is not None:
+            digest.update(b"\0")
+            digest.update(lock_bytes)
+        return digest.hexdigest()[:16]
+    
+    def _record_link(self, entry_dir: Path, link_path: Path) -> None:
+        """
+        Remember that a project links to a pool entry, so eviction skips it
+        
+        Args:
+            entry_dir: Pool entry directory
+            link_path: Project node_modules symlink pointing into the entry
+        """
+        link_path = link_path.absolute()
+        links_dir = entry_dir / ".links"
+        links_dir.mkdir(exist_ok=True)
+        name = hashlib.blake2b(str(link_path).encode("utf-8")).hexdigest()[:16]
+        (links_dir / name).write_text(str(link_path), encoding="utf-8")
+    
+    def _is_referenced(self, entry_dir: Path) -> bool:
+        """
+        Check whether any project still links to a pool entry
+        
+        Records for projects that were deleted or relinked elsewhere are
+        pruned along the way.
+        
+        Args:
+            entry_dir: Pool entry directory
+            
+        Returns:
+            True if at least one project's node_modules points into the entry
+        """
+        links_dir = entry_dir / ".links"
+        if not links_dir.is_dir():
+            return False
+        
+        target = os.path.realpath(entry_dir / "node_modules")
+        referenced = False
+        for record in links_dir.iterdir():
+            try:
+                link_path = record.read_text(encoding="utf-8")
+            except OSError:
+                continue
+            if os.path.islink(link_path) and os.path.realpath(link_path) == target:
+                referenced = True
+            else:
+                record.unlink(missing_ok=True)
+        return referenced
+    
+    def _schedule_pool_install(
+        self,
+        key: str,
+        manifest: Dict[str, Dict[str, str]],
+        lock_bytes: Optional[bytes]
+    ) -> None:
+        """
+        Start installing a pool entry in the background, once per key per process
+        
+        Args:
+            key: Pool entry key
+            manifest: dependencies and devDependencies to install
+            lock_bytes: Raw package-lock.json contents, or None if there is none
+        """
+        task = self._pool_tasks.get(key)
+        if task is not None and not task.done():
+            return
+        
+        task = asyncio.create_task(self._install_pool_entry(key, manifest, lock_bytes))
+        self._pool_tasks[key] = task
+        task.add_done_callback(lambda done: self._pool_task_done(key, done))
+    
+    def _pool_task_done(self, key: str, task: asyncio.Task) -> None:
+        """Forget a finished background pool install and log any failure"""
+        self._pool_tasks.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Pooled install for {key} failed: {task.exception()}")
+    
+    async def _install_pool_entry(
+        self,
+        key: str,
+        manifest: Dict[str, Dict[str, str]],
+        lock_bytes: Optional[bytes]
+    ) -> None:
+        """
+        Install node_modules for a set of dependencies into the pool
+        
+        A non-blocking flock on a per-key lock file keeps other worker
+        processes from installing the same entry; whoever loses the race
+        simply leaves it to the winner (where flock is unavailable, only
+        installs within this process are deduplicated). The install runs in
+        a staging directory that is renamed into place only once complete,
+        so a visible entry is always usable.
+        
+        Args:
+            key: Pool entry key
+            manifest: dependencies and devDependencies to install
+            lock_bytes: Raw package-lock.json contents, or None if there is none
+        """
+        entry_dir = self.pool_dir / key
+        staging_dir = self.pool_dir / f"{key}.staging"
+        
+        with open(self.pool_dir / f"{key}.lock", "w") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    logger.info(f"Pool entry {key} is being installed by another process")
+                    return
+            
+            if (entry_dir / ".ready").exists():
+                return
+            
+            # Leftovers from an install that was killed or timed out
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            staging_dir.mkdir(parents=True)
+            package_data = {"name": f"pool-{key}", "version": "1.0.0", "private": True, **manifest}
+            with open(staging_dir / "package.json", "w") as f:
+                json.dump(package_data, f, indent=2)
+            if lock_bytes is not None:
+                (staging_dir / "package-lock.json").write_bytes(lock_bytes)
+            
+            logger.info(f"Installing pooled node_modules for package.json {key}...")
+            process = await asyncio.create_subprocess_exec(
+                "npm", "install", "--legacy-peer-deps",
+                cwd=str(staging_dir),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            
+            try:
+                async with asyncio.timeout(_POOL_INSTALL_TIMEOUT):
+                    _, stderr = await process.communicate()
+            except BaseException as e:
+                process.kill()
+                await process.wait()
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                if isinstance(e, TimeoutError):
+                    logger.error(f"Pooled npm install for {key} timed out after {_POOL_INSTALL_TIMEOUT}s")
+                    return
+                raise
+            
+            if process.returncode != 0:
+                error_msg = stderr.decode(errors="replace") if stderr else "Unknown error"
+                logger.error(f"Pooled npm install failed for {key}: {error_msg}")
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                return
+            
+            (staging_dir / ".ready").touch()
+            # An entry without .ready is incomplete; replace it
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(staging_dir, entry_dir)
+            logger.info(f"✅ Pooled node_modules ready: {entry_dir / 'node_modules'}")
+        
+        self.cleanup_old_caches()
+    
     def get_global_node_modules_path(self) -> str:
         """
         Get path to global node_modules
@@ -328,9 +574,34 @@ class SharedDependenciesManager:
     
     def cleanup_old_caches(self, max_age_days: int = 7):
         """
-        Clean up old dependency caches (not used with global approach)
+        Evict unreferenced pool entries not linked recently
+        
+        At most _POOL_MAX_ENTRIES unreferenced entries are kept. Entries that a
+        project's node_modules still links to are never evicted, and the
+        global node_modules is never touched.
         
         Args:
-            max_age_days: Maximum age in days
+            max_age_days: Maximum age in days since an entry was last linked
         """
-        logger.info("Cleanup not needed with global node_modules approach")
+        entries = []
+        for entry in self.pool_dir.iterdir():
+            try:
+                entries.append((entry.joinpath(".ready").stat().st_mtime, entry))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        entries.sort(reverse=True)
+        
+        cutoff = time.time() - max_age_days * 86400
+        evicted = 0
+        kept = 0
+        for last_used, entry in entries:
+            if self._is_referenced(entry):
+                continue
+            if kept >= _POOL_MAX_ENTRIES or last_used < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+                evicted += 1
+            else:
+                kept += 1
+        
+        if evicted:
+            logger.info(f"Evicted {evicted} pooled node_modules entries")
@@ -3,14 +3,28 @@ Streaming Generator Service
 Real-time progressive app generation with WebSocket updates
 """
 import asyncio
+import copy
+import hashlib
 import logging
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from services.semantic_cache import SemanticCache
+from utils.singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
+# Small embedding model used to match near-duplicate prompts
+_EMBEDDING_MODEL = "text-embedding-3-small"
+_EMBEDDING_DIMENSIONS = 256
+
+# Cosine similarity above which a prompt reuses cached screens
+_SCREEN_CACHE_THRESHOLD = 0.92
+
 
 class GenerationStage(str, Enum):
     """Stages of app generation"""
@@ -69,15 +83,36 @@ class StreamingGenerator:
         project_manager,
         command_executor,
         tunnel_manager,
-        cloud_storage_manager=None
+        cloud_storage_manager=None,
+        use_screen_cache: bool = False
     ):
-        """Initialize with service dependencies"""
+        """
+        Initialize with service dependencies
+        
+        Args:
+            use_screen_cache: Reuse screens from the same user's similar earlier
+                prompts (costs an embedding call per generation)
+        """
         self.code_generator = code_generator
         self.screen_generator = screen_generator
         self.project_manager = project_manager
         self.command_executor = command_executor
         self.tunnel_manager = tunnel_manager
         self.cloud_storage_manager = cloud_storage_manager
+        self.screen_cache = (
+            SemanticCache(threshold=_SCREEN_CACHE_THRESHOLD) if use_screen_cache else None
+        )
+        # Screen analyses in progress, keyed by user and prompt hash
+        self._inflight = SingleFlight()
+        # Dedicated pool so screen writes don't queue behind other default-executor work
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=max(2, (os.cpu_count() or 2) // 2),
+            thread_name_prefix="screen-write"
+        )
+    
+    def close(self) -> None:
+        """Finish pending screen writes and stop the writer threads (call on application shutdown)"""
+        self._write_executor.shutdown(wait=True)
         
     async def generate_with_streaming(
         self,
@@ -103,6 +138,7 @@ class StreamingGenerator:
         import models.project
         from datetime import datetime
         
+        screens_task = None
         try:
             # Stage 1: Quick analysis (5%)
             await self._send_progress(
@@ -132,6 +168,15 @@ class StreamingGenerator:
                 "screens": ["Home", "Profile", "Settings", "About"]
             }
             
+            # Start the screen-analysis LLM call now so it overlaps project
+            # creation and npm install instead of waiting for the preview
+            if not skip_screens:
+                screens_task = asyncio.create_task(self._analyze_screens(prompt, user_id))
+                # Keep an unawaited failure (e.g. after an earlier stage fails) out of the logs
+                screens_task.add_done_callback(
+                    lambda task: task.cancelled() or task.exception()
+                )
+            
             # Stage 2: Create project structure (15%)
             await self._send_progress(
                 progress_callback,
@@ -290,7 +335,8 @@ class StreamingGenerator:
                     prompt,
                     project.directory,
                     screen_suggestions,
-                    progress_callback
+                    progress_callback,
+                    screens_task
                 )
             else:
                 # Skip screen generation for faster preview
@@ -406,6 +452,9 @@ class StreamingGenerator:
                 error=str(e)
             )
             raise
+        finally:
+            if screens_task is not None and not screens_task.done():
+                screens_task.cancel()
     
     async def _send_progress(
         self,
@@ -516,24 +565,106 @@ const styles = StyleSheet.create({
             expo_version="50.0.0"
         )
     
+    async def _analyze_screens(self, prompt: str, user_id: Optional[str]) -> List:
+        """
+        Generate screen definitions, sharing one analysis between identical requests
+        
+        A resubmitted request (double click, client retry) joins the analysis
+        already in flight for the same user and prompt instead of paying for
+        a second LLM call; each caller gets its own copy of the definitions.
+        Cancelling one caller doesn't cancel the others.
+        
+        Args:
+            prompt: User's app description
+            user_id: User identifier
+            
+        Returns:
+            List of ScreenDefinition objects
+        """
+        key = hashlib.sha256(f"{user_id}:{prompt.strip()}".encode('utf-8')).hexdigest()
+        
+        if key in self._inflight:
+            logger.info("Joining in-flight screen analysis for identical prompt")
+        screens = await self._inflight.do(key, lambda: self._analyze_screens_cached(prompt, user_id))
+        # Every caller shares the task's result, so each gets its own copy
+        return copy.deepcopy(screens)
+    
+    async def _analyze_screens_cached(self, prompt: str, user_id: Optional[str]) -> List:
+        """
+        Generate screen definitions, reusing screens from similar prompts if enabled
+        
+        The screen cache is scoped to the user, so screens are never shared
+        between users.
+        
+        Args:
+            prompt: User's app description
+            user_id: User identifier
+            
+        Returns:
+            List of ScreenDefinition objects
+        """
+        embedding = None
+        if self.screen_cache is not None and user_id:
+            embedding = await self._embed_prompt(prompt)
+        
+        if embedding is not None:
+            cached = self.screen_cache.search(user_id, embedding)
+            if cached is not None:
+                logger.info(f"Reusing {len(cached)} cached screen definitions")
+                return copy.deepcopy(cached)
+        
+        screens = await self.screen_generator.analyze_and_generate_screens(
+            prompt,
+            generate_images=False  # Images come later
+        )
+        
+        if embedding is not None and screens:
+            self.screen_cache.insert(user_id, embedding, copy.deepcopy(screens))
+        return screens
+    
+    async def _embed_prompt(self, prompt: str) -> Optional[List[float]]:
+        """
+        Embed a prompt for the semantic screen cache
+        
+        Args:
+            prompt: User's app description
+            
+        Returns:
+            Embedding vector, or None if embedding failed
+        """
+        try:
+            response = await self.screen_generator.client.embeddings.create(
+                model=_EMBEDDING_MODEL,
+                input=prompt.strip(),
+                dimensions=_EMBEDDING_DIMENSIONS
+            )
+        except Exception as e:
+            logger.warning("Prompt embedding failed, skipping screen cache: %s", e)
+            return None
+        return response.data[0].embedding
+    
     async def _generate_screens_progressively(
         self,
         prompt: str,
         project_dir: str,
         screen_suggestions: Dict,
-        progress_callback: Callable
+        progress_callback: Callable,
+        screens_task: Optional[asyncio.Task] = None
     ) -> List[str]:
-        """Generate screens in batches with progress updates"""
+        """Generate screens in batches with progress updates, reusing a prefetched analysis if given"""
         screens_added = []
         
         if not screen_suggestions or screen_suggestions.get('total_screens', 0) == 0:
             return screens_added
         
         # Generate screens
-        screen_definitions = await self.screen_generator.analyze_and_generate_screens(
-            prompt,
-            generate_images=False  # Images come later
-        )
+        if screens_task is not None:
+            screen_definitions = await screens_task
+        else:
+            screen_definitions = await self.screen_generator.analyze_and_generate_screens(
+                prompt,
+                generate_images=False  # Images come later
+            )
         
         # Write screens in batches
         batch_size = 2
@@ -543,9 +674,9 @@ const styles = StyleSheet.create({
             batch = screen_definitions[i:i + batch_size]
             
             # Write batch
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             created_files = await loop.run_in_executor(
-                None,
+                self._write_executor,
                 self.screen_generator.write_screens_to_project,
                 batch,
                 project_dir
@@ -122,7 +122,7 @@ class TunnelManager:
         """
         try:
             # Run ngrok.connect in executor to avoid blocking
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             tunnel = await loop.run_in_executor(
                 None,
                 lambda: ngrok.connect(port, bind_tls=True)
@@ -155,7 +155,7 @@ class TunnelManager:
         
         try:
             # Close the tunnel
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             await loop.run_in_executor(
                 None,
                 lambda: ngrok.disconnect(tunnel.public_url)
@@ -183,7 +183,7 @@ class TunnelManager:
         """
         try:
             # Get all active ngrok tunnels
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             tunnels = await loop.run_in_executor(
                 None,
                 ngrok.get_tunnels
@@ -0,0 +1,83 @@
+"""
+FileManager Tests
+Checks that editor writes land in the directory the project runs from
+
+Run with: python -m unittest test_file_manager
+"""
+import os
+import tempfile
+import unittest
+
+from services.file_manager import FileManager
+
+
+class WriteFilesTest(unittest.TestCase):
+    """FileManager.write_files as used by the chat-edit endpoint"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.base_dir = os.path.join(self._tmp.name, "projects")
+        # Generated projects live under an app-named folder, not the project ID
+        self.project_directory = os.path.join(self.base_dir, "taskmasterab12")
+        os.makedirs(self.project_directory)
+        directories = {"proj-1": self.project_directory}
+        self.file_manager = FileManager(self.base_dir, directory_lookup=directories.get)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_edits_land_in_project_directory(self):
+        files = {"app/index.tsx": "export default 1;", "components/Button.tsx": "b"}
+
+        self.assertTrue(self.file_manager.write_files("proj-1", files))
+
+        for rel_path, content in files.items():
+            with open(os.path.join(self.project_directory, rel_path), encoding="utf-8") as f:
+                self.assertEqual(f.read(), content)
+        self.assertFalse(os.path.exists(os.path.join(self.base_dir, "proj-1")))
+
+    def test_unknown_project_falls_back_to_projects_dir(self):
+        self.assertTrue(self.file_manager.write_files("proj-2", {"app/index.tsx": "x"}))
+
+        self.assertTrue(os.path.isfile(os.path.join(self.base_dir, "proj-2", "app", "index.tsx")))
+
+    def test_path_outside_project_writes_nothing(self):
+        files = {"app/ok.tsx": "ok", "../escape.tsx": "bad"}
+
+        self.assertFalse(self.file_manager.write_files("proj-1", files))
+
+        self.assertFalse(os.path.exists(os.path.join(self.project_directory, "app", "ok.tsx")))
+        self.assertFalse(os.path.exists(os.path.join(self.base_dir, "escape.tsx")))
+
+
+class ResolveTest(unittest.TestCase):
+    """Path containment checks shared by every editor operation"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.project_directory = os.path.join(self._tmp.name, "projects", "proj-1")
+        self.outside = os.path.join(self._tmp.name, "pool", "node_modules")
+        os.makedirs(self.project_directory)
+        os.makedirs(self.outside)
+        with open(os.path.join(self.outside, "secret.js"), "w", encoding="utf-8") as f:
+            f.write("outside")
+        self.file_manager = FileManager(os.path.join(self._tmp.name, "projects"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks unsupported")
+    def test_symlink_inside_project_cannot_escape(self):
+        os.symlink(self.outside, os.path.join(self.project_directory, "node_modules"))
+
+        self.assertIsNone(self.file_manager.read_file("proj-1", "node_modules/secret.js"))
+        self.assertFalse(self.file_manager.write_file("proj-1", "node_modules/secret.js", "x"))
+
+    def test_regular_paths_resolve_inside_project(self):
+        self.assertTrue(self.file_manager.write_file("proj-1", "app/./index.tsx", "ok"))
+
+        self.assertEqual(self.file_manager.read_file("proj-1", "app/index.tsx"), "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
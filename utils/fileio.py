@@ -0,0 +1,26 @@
+"""
+File I/O Utility
+Low-overhead file writes shared by the editor and image services
+"""
+import os
+
+# O_BINARY keeps Windows from translating newlines; it is 0 elsewhere
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+def write_bytes(path: str, data: bytes) -> None:
+    """
+    Write bytes to a file with raw os calls, replacing existing content
+
+    Args:
+        path: Destination file; its directory must already exist
+        data: Bytes to write
+    """
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            # A single write almost always takes everything; loop for the rest
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
@@ -4,6 +4,7 @@ Provides retry decorator with exponential backoff for handling transient failure
 """
 import asyncio
 import logging
+import random
 from typing import Callable, TypeVar, Any, Type, Tuple, Optional
 from functools import wraps
 
@@ -18,7 +19,10 @@ async def with_retry(
     delay: float = 1.0,
     backoff: float = 2.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable[[Exception, int], None]] = None
+    on_retry: Optional[Callable[[Exception, int], None]] = None,
+    jitter: float = 0.0,
+    max_delay: Optional[float] = None,
+    no_retry: Tuple[Type[Exception], ...] = ()
 ) -> T:
     """
     Execute async function with exponential backoff retry
@@ -30,6 +34,9 @@ async def with_retry(
         backoff: Multiplier for delay after each retry (default: 2.0)
         exceptions: Tuple of exception types to catch and retry (default: all exceptions)
         on_retry: Optional callback function called on each retry with (exception, attempt)
+        jitter: Maximum random seconds added to each delay (default: 0.0)
+        max_delay: Optional cap on the delay between retries in seconds
+        no_retry: Subclasses of the retried exceptions to raise immediately instead
         
     Returns:
         Result from successful function execution
@@ -61,15 +68,23 @@ async def with_retry(
         except exceptions as e:
             last_exception = e
             
+            if isinstance(e, no_retry):
+                raise
+            
             if attempt == max_attempts:
                 logger.error(
                     f"Operation failed after {max_attempts} attempts: {str(e)}"
                 )
                 raise
             
+            # Random jitter spreads out retries from concurrent callers
+            sleep_for = current_delay + random.uniform(0, jitter) if jitter else current_delay
+            if max_delay is not None:
+                sleep_for = min(sleep_for, max_delay)
+            
             logger.warning(
                 f"Attempt {attempt}/{max_attempts} failed: {str(e)}. "
-                f"Retrying in {current_delay:.1f}s..."
+                f"Retrying in {sleep_for:.1f}s..."
             )
             
             # Call retry callback if provided
@@ -80,7 +95,7 @@ async def with_retry(
                     logger.warning(f"Retry callback error: {callback_error}")
             
             # Wait before next attempt
-            await asyncio.sleep(current_delay)
+            await asyncio.sleep(sleep_for)
             
             # Increase delay for next attempt (exponential backoff)
             current_delay *= backoff
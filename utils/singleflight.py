@@ -0,0 +1,72 @@
+"""
+Singleflight Utility
+Coalesces concurrent identical async calls into one shared task
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class _Call:
+    """A shared in-flight task and the number of callers awaiting it"""
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time, sharing its result
+
+    The work runs in a detached task that every caller awaits through
+    asyncio.shield, so cancelling one caller (including the first) never
+    cancels the others. The task is cancelled only when every caller
+    waiting on it has been cancelled.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await the in-flight call for key, starting func() if there is none
+
+        Args:
+            key: Identity of the call; equal keys share one execution
+            func: Zero-argument coroutine function doing the work
+
+        Returns:
+            Result of the shared call
+
+        Raises:
+            Whatever the shared call raised
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller gave up; nobody needs the result
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        """Drop the entry for key if it still refers to call"""
+        if self._calls.get(key) is call:
+            del self._calls[key]